@@ -0,0 +1,15 @@
+"""
+Performance benchmarks for coala-utils.
+
+The benchmarks are written in the style of `asv <https://asv.readthedocs.io>`_:
+Each module contains classes with ``time_*`` methods, optionally
+parametrized through the ``params`` and ``param_names`` class attributes and
+prepared by a ``setup()`` method receiving the current parameters.
+
+They can be run offline without any additional dependency::
+
+    python -m benchmarks --output results.json
+    python -m benchmarks --compare results.json
+
+Run ``python -m benchmarks --help`` for all options.
+"""
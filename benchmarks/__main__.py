@@ -0,0 +1,218 @@
+import argparse
+import importlib
+import inspect
+import itertools
+import json
+import os
+import pkgutil
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import timeit
+
+import benchmarks
+
+
+def get_commit():
+    """
+    Retrieves the hash of the currently checked out git commit.
+
+    :return: The commit hash or None if it can't be determined.
+    """
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL,
+            universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def collect_benchmarks(pattern):
+    """
+    Collects all benchmarks from the modules of the ``benchmarks`` package.
+
+    :param pattern: A regex the full benchmark name
+                    (``module.Class.time_method``) has to match.
+    :return:        An iterator returning ``(name, class, method name)``
+                    tuples.
+    """
+    for module_info in pkgutil.iter_modules(benchmarks.__path__):
+        if module_info.name.startswith('_'):
+            continue
+
+        try:
+            module = importlib.import_module(
+                'benchmarks.' + module_info.name)
+        except ImportError as ex:
+            print('Skipping benchmarks.{}: {}'.format(module_info.name, ex),
+                  file=sys.stderr)
+            continue
+
+        for class_name, cls in inspect.getmembers(module, inspect.isclass):
+            if cls.__module__ != module.__name__:
+                continue
+
+            for method_name in sorted(vars(cls)):
+                name = '.'.join((module_info.name, class_name, method_name))
+                if (method_name.startswith('time_') and
+                        re.search(pattern, name)):
+                    yield name, cls, method_name
+
+
+def time_benchmark(cls, method_name, params, repeat, min_time):
+    """
+    Times a single benchmark with the given parameters.
+
+    :param cls:         The benchmark class.
+    :param method_name: The name of the ``time_*`` method.
+    :param params:      The parameters to pass to ``setup()`` and the method.
+    :param repeat:      How many times the measurement is repeated.
+    :param min_time:    The minimum time in seconds a single measurement
+                        should take. The number of calls per measurement is
+                        increased until this time is reached.
+    :return:            A dict holding the timing results in seconds per call.
+    """
+    instance = cls()
+    if hasattr(instance, 'setup'):
+        instance.setup(*params)
+
+    try:
+        timer = timeit.Timer(
+            lambda: getattr(instance, method_name)(*params))
+
+        number = 1
+        while True:
+            elapsed = timer.timeit(number)
+            if elapsed >= min_time or number >= 1 << 20:
+                break
+            number *= 10 if elapsed < min_time / 10 else 2
+
+        timings = [elapsed / number] + [
+            time / number for time in timer.repeat(repeat - 1, number)]
+    finally:
+        if hasattr(instance, 'teardown'):
+            instance.teardown(*params)
+
+    return {'min': min(timings),
+            'median': statistics.median(timings),
+            'number': number,
+            'repeat': repeat}
+
+
+def run(pattern, max_size, repeat, min_time):
+    """
+    Runs all benchmarks matching the given pattern.
+
+    :param pattern:  A regex the full benchmark name has to match.
+    :param max_size: Parameter combinations with a ``size`` parameter bigger
+                     than this are skipped.
+    :param repeat:   How many times each measurement is repeated.
+    :param min_time: The minimum time of a single measurement in seconds.
+    :return:         A dict mapping the benchmark names to a list of results.
+    """
+    results = {}
+    for name, cls, method_name in collect_benchmarks(pattern):
+        param_names = getattr(cls, 'param_names', ())
+        params = getattr(cls, 'params', ())
+        if params and not isinstance(params[0], (list, tuple)):
+            params = (params,)
+
+        results[name] = []
+        for combination in itertools.product(*params):
+            named = dict(zip(param_names, combination))
+            if named.get('size', 0) > max_size:
+                continue
+
+            try:
+                result = time_benchmark(cls, method_name, combination, repeat,
+                                        min_time)
+            except NotImplementedError:
+                # Like asv, setup() may skip unsupported parameters this way.
+                continue
+
+            result['params'] = named
+            results[name].append(result)
+
+            print('{} {} {:.3g}s'.format(
+                name,
+                ', '.join('{}={!r}'.format(*item) for item in named.items()),
+                result['min']))
+
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Prints the ratio between the given results and a baseline run.
+
+    :param results:   The results of the current run.
+    :param baseline:  The results of the baseline run as loaded from JSON.
+    :param threshold: Ratios bigger than this are reported as regressions.
+    :return:          True if no regression was found, False otherwise.
+    """
+    success = True
+    for name, entries in sorted(results.items()):
+        base_entries = baseline['results'].get(name, [])
+        for entry in entries:
+            for base_entry in base_entries:
+                if base_entry['params'] == entry['params']:
+                    ratio = entry['min'] / base_entry['min']
+                    regression = ratio > threshold
+                    success = success and not regression
+                    print('{:<6} {:6.2f}x {} {}'.format(
+                        'SLOWER' if regression else '',
+                        ratio,
+                        name,
+                        entry['params']))
+                    break
+
+    return success
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Runs the coala-utils benchmarks.')
+    parser.add_argument('-b', '--bench', default='',
+                        help='regex selecting the benchmarks to run')
+    parser.add_argument('--max-size', type=int, default=1024 * 1024,
+                        help='skip inputs bigger than this many characters '
+                             '(default: 1 MiB)')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='number of measurements per benchmark')
+    parser.add_argument('--min-time', type=float, default=0.05,
+                        help='minimum duration of a measurement in seconds')
+    parser.add_argument('-o', '--output',
+                        help='write the results as JSON to this file')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='compare against the JSON results of an earlier '
+                             'run')
+    parser.add_argument('--threshold', type=float, default=1.1,
+                        help='slowdown ratio considered a regression when '
+                             'comparing (default: 1.1)')
+    args = parser.parse_args(args)
+
+    results = run(args.bench, args.max_size, args.repeat, args.min_time)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'commit': get_commit(),
+                       'python': platform.python_version(),
+                       'machine': platform.machine(),
+                       'results': results},
+                      file, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as file:
+            if not compare(results, json.load(file), args.threshold):
+                return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
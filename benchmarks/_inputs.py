@@ -0,0 +1,76 @@
+from collections import deque
+import random
+
+
+KB = 1024
+MB = 1024 * KB
+
+# The input sizes (in characters) the scaling benchmarks are run with.
+SIZES = [KB, MB, 100 * MB]
+
+# The fraction of characters being separators (match density) or escape
+# characters (escape density).
+DENSITIES = [0.0, 0.01, 0.1]
+
+# Synthetic inputs are built by repeating a block of this size, generating
+# every character randomly would take longer than the benchmarks themselves.
+_BLOCK_SIZE = 64 * KB
+
+
+def consume(iterator):
+    """
+    Exhausts the given iterator without storing its elements.
+    """
+    deque(iterator, maxlen=0)
+
+
+def repeat_to_size(block, size):
+    """
+    Repeats the given string until it has exactly the given size.
+    """
+    return (block * (size // len(block) + 1))[:size]
+
+
+def make_text(size, match_density=0.01, escape_density=0.0, separator=','):
+    """
+    Generates a deterministic pseudo-random text.
+
+    :param size:           The length of the text.
+    :param match_density:  The fraction of characters being the separator.
+    :param escape_density: The fraction of characters being preceded by a
+                           backslash.
+    :param separator:      The separator string.
+    :return:               The generated text.
+    """
+    rng = random.Random(size)
+    alphabet = 'abcdefghijklmnopqrstuvwxyz '
+    chars = []
+    length = 0
+    while length < min(size, _BLOCK_SIZE):
+        value = rng.random()
+        if value < match_density:
+            char = separator
+        else:
+            char = rng.choice(alphabet)
+
+        if rng.random() < escape_density:
+            char = '\\' + char
+
+        chars.append(char)
+        length += len(char)
+
+    return repeat_to_size(''.join(chars), size)
+
+
+def make_nested(size, depth, begin='(', end=')'):
+    """
+    Generates a text consisting of repeated blocks nested ``depth`` levels
+    deep.
+
+    :param size:  The length of the text.
+    :param depth: The nesting depth of each block.
+    :param begin: The begin sequence.
+    :param end:   The end sequence.
+    :return:      The generated text.
+    """
+    return repeat_to_size(begin * depth + 'x' + end * depth + ' ', size)
@@ -0,0 +1,104 @@
+import sys
+import subprocess
+from contextlib import ExitStack
+
+from coala_utils.ContextManagers import (
+    prepare_file, prepare_files, retrieve_fd_output, retrieve_stdout,
+    subprocess_timeout)
+
+from benchmarks._inputs import MB
+
+
+class SubprocessTimeout:
+    """
+    Measures supervising many concurrent short-lived processes.
+    """
+    params = [10, 100, 1000]
+    param_names = ['processes']
+
+    def time_subprocess_timeout(self, processes):
+        with ExitStack() as stack:
+            started = []
+            for _ in range(processes):
+                process = stack.enter_context(subprocess.Popen(
+                    [sys.executable, '-S', '-c', '']))
+                stack.enter_context(subprocess_timeout(process, 60))
+                started.append(process)
+
+            for process in started:
+                process.wait()
+
+
+class RetrieveStdout:
+    """
+    Measures printing while the output is retrieved.
+    """
+
+    def time_print(self):
+        with retrieve_stdout():
+            for i in range(1000):
+                print('line', i)
+
+    def time_write(self):
+        with retrieve_stdout():
+            for i in range(1000):
+                sys.stdout.write('line\n')
+
+
+class RetrieveFdOutput:
+    """
+    Measures capturing the output of a chatty child process with a bounded
+    buffer.
+    """
+    params = [MB, 100 * MB]
+    param_names = ['size']
+
+    def time_retrieve_fd_output(self, size):
+        code = ('import sys\n'
+                'for _ in range({}):\n'
+                '    sys.stdout.buffer.write(bytes(65536))').format(
+                    size // 65536)
+        with retrieve_fd_output(max_size=MB):
+            subprocess.check_call([sys.executable, '-c', code])
+
+
+class PrepareFile:
+    """
+    Measures creating many small temporary files, as test suites do for their
+    fixtures.
+    """
+    params = [False, True]
+    param_names = ['in_memory']
+
+    def setup(self, in_memory):
+        self.lines = ['line {}'.format(i) for i in range(20)]
+
+    def time_prepare_file(self, in_memory):
+        for _ in range(100):
+            with prepare_file(self.lines, None,
+                              tempfile_kwargs={'in_memory': in_memory}):
+                pass
+
+
+class PrepareFiles:
+    """
+    Measures creating the fixtures of a test case needing many files.
+    """
+    params = [[50], [1, 4]]
+    param_names = ['files', 'workers']
+
+    def setup(self, files, workers):
+        lines = ['line {}'.format(i) for i in range(20)]
+        self.files = {'dir{}/file{}'.format(i % 5, i): lines
+                      for i in range(files)}
+
+    def time_prepare_file(self, files, workers):
+        if workers != 1:
+            raise NotImplementedError('prepare_file has no workers.')
+        with ExitStack() as stack:
+            for lines in self.files.values():
+                stack.enter_context(prepare_file(lines, None))
+
+    def time_prepare_files(self, files, workers):
+        with prepare_files(self.files, workers=workers):
+            pass
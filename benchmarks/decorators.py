@@ -0,0 +1,214 @@
+import random
+from collections import namedtuple
+
+from coala_utils.decorators import (
+    arguments_to_lists, enforce_signature, fast_sorted,
+    generate_consistency_check, get_public_members, set_signature_enforcement,
+    signature_type_by_name, yield_once)
+from coala_utils.string_processing import InBetweenMatch, Match
+
+from benchmarks._inputs import consume
+
+
+def make_matches(count):
+    """
+    Generates ``Match`` objects at pseudo-random positions.
+    """
+    rng = random.Random(count)
+    return [Match('x' * rng.randint(0, 3), rng.randint(0, count))
+            for _ in range(count)]
+
+
+class MatchOrdering:
+    params = [10000, 1000000]
+    param_names = ['size']
+
+    def setup(self, size):
+        self.matches = make_matches(size)
+        self.in_between_matches = [
+            InBetweenMatch(Match('(', position),
+                           Match('', position + 1),
+                           Match(')', position + 1))
+            for position in (match.position for match in self.matches)]
+
+    def time_sort(self, size):
+        sorted(self.matches)
+
+    def time_sort_in_between_matches(self, size):
+        sorted(self.in_between_matches)
+
+    def time_eq(self, size):
+        matches = self.matches
+        for i in range(len(matches) - 1):
+            matches[i] == matches[i + 1]
+
+    def time_fast_sorted(self, size):
+        fast_sorted(self.matches)
+
+    def time_fast_sorted_in_between_matches(self, size):
+        fast_sorted(self.in_between_matches)
+
+
+class MatchRepr:
+    params = [100000]
+    param_names = ['size']
+
+    def setup(self, size):
+        self.matches = make_matches(size)
+
+    def time_repr(self, size):
+        repr(self.matches)
+
+
+class EnforceSignature:
+    """
+    Measures the overhead ``enforce_signature`` adds to each call.
+    """
+
+    def setup(self):
+        def function(a, b, c=None, d=None):
+            pass
+
+        @enforce_signature
+        def decorated(a: int, b: (str, None), c: (int, None)=None,
+                      d: signature_type_by_name('Match')=None):
+            pass
+
+        self.function = function
+        self.decorated = decorated
+        self.match = Match('', 0)
+
+    def teardown(self):
+        set_signature_enforcement(True)
+
+    def time_undecorated(self):
+        self.function(1, 'b', 3, d=self.match)
+
+    def time_decorated(self):
+        self.decorated(1, 'b', 3, d=self.match)
+
+    def time_decorated_disabled(self):
+        set_signature_enforcement(False)
+        self.decorated(1, 'b', 3, d=self.match)
+
+
+class ArgumentsToLists:
+    """
+    Measures the overhead ``arguments_to_lists`` adds to each call.
+    """
+
+    def setup(self):
+        def function(files, ignore=None, *, settings=None):
+            pass
+
+        self.function = function
+        self.decorated = arguments_to_lists(function)
+        self.files = ['a.py', 'b.py']
+
+    def time_undecorated(self):
+        self.function(self.files, None, settings='value')
+
+    def time_decorated_lists(self):
+        self.decorated(self.files, [], settings=[])
+
+    def time_decorated_conversion(self):
+        self.decorated(self.files, None, settings='value')
+
+
+class ConsistencyCheck:
+    """
+    Measures checking the consistency of many namedtuple based records.
+    """
+    params = [1000000]
+    param_names = ['size']
+
+    def setup(self, size):
+        @generate_consistency_check('name', 'value')
+        class Record(namedtuple('RecordBase', 'name, value, comment')):
+            pass
+
+        self.Record = Record
+        self.records = [Record(str(index), index, None)
+                        for index in range(size)]
+
+    def time_check_consistency(self, size):
+        [index for index, record in enumerate(self.records)
+         if not record.check_consistency()]
+
+    def time_check_consistency_many(self, size):
+        self.Record.check_consistency_many(self.records)
+
+
+class PublicMembers:
+    """
+    Measures ``get_public_members`` over many objects, as done for bulk
+    serialization.
+    """
+    params = [10000]
+    param_names = ['size']
+
+    def setup(self, size):
+        class Record:
+            kind = 'record'
+
+            def __init__(self, index):
+                self.index = index
+                self.name = str(index)
+                self.values = [index]
+
+            @property
+            def double(self):
+                return 2 * self.index
+
+            def method(self):
+                pass
+
+        self.records = [Record(index) for index in range(size)]
+
+    def time_get_public_members(self, size):
+        for record in self.records:
+            get_public_members(record)
+
+    def time_get_public_members_without_properties(self, size):
+        for record in self.records:
+            get_public_members(record, include_properties=False)
+
+
+class YieldOnce:
+    """
+    Measures deduplicating a stream where every value occurs twice on
+    average.
+    """
+    params = [10000, 100000, 1000000]
+    param_names = ['size']
+
+    def setup(self, size):
+        rng = random.Random(size)
+        self.values = [rng.randrange(size // 2) for _ in range(size)]
+        self.matches = make_matches(size)
+
+        @yield_once
+        def generate(values):
+            return values
+
+        @yield_once(window=1000)
+        def generate_window(values):
+            return values
+
+        self.generate = generate
+        self.generate_window = generate_window
+
+    def time_yield_once(self, size):
+        consume(self.generate(self.values))
+
+    def time_yield_once_window(self, size):
+        consume(self.generate_window(self.values))
+
+    def time_yield_once_matches(self, size):
+        consume(self.generate(self.matches))
+
+    def time_yield_once_unhashable(self, size):
+        if size > 10000:
+            # Unhashable values are still compared one by one.
+            raise NotImplementedError('Quadratic in size.')
+        consume(self.generate([value] for value in self.values))
@@ -0,0 +1,22 @@
+from coala_utils.string_processing.StringConverter import StringConverter
+
+from benchmarks._inputs import DENSITIES, KB, MB, make_text
+
+
+class StringConverterConversion:
+    params = ([KB, 64 * KB, MB], DENSITIES)
+    param_names = ('size', 'escape_density')
+
+    def setup(self, size, escape_density):
+        self.list_value = make_text(size, 0.05, escape_density)
+        self.dict_value = make_text(size, 0.05, escape_density).replace(
+            'e', ':')
+
+    def time_list(self, size, escape_density):
+        list(StringConverter(self.list_value))
+
+    def time_dict(self, size, escape_density):
+        dict(StringConverter(self.dict_value))
+
+    def time_str(self, size, escape_density):
+        str(StringConverter(self.list_value))
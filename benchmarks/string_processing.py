@@ -0,0 +1,137 @@
+import os
+
+from coala_utils.string_processing import (
+    escape, nested_search_in_between, nested_search_tree,
+    parallel_search_for, search_for, search_in_between, split, unescape,
+    unescaped_nested_search_in_between, unescaped_search_for,
+    unescaped_search_in_between, unescaped_split, unescaped_strip)
+from tests.string_processing.StringProcessingTestBase import (
+    StringProcessingTestBase)
+
+from benchmarks._inputs import (
+    DENSITIES, MB, SIZES, consume, make_nested, make_text)
+
+
+class Fixtures:
+    """
+    Runs the functions over the inputs of the correctness tests.
+    """
+
+    def setup(self):
+        base = StringProcessingTestBase
+        self.test_strings = base.test_strings + base.auto_trim_test_strings
+        self.in_between_strings = base.search_in_between_test_strings
+        self.multi_pattern_string = base.multi_pattern_test_string
+        self.multi_patterns = base.multi_patterns
+
+    def time_unescaped_split(self):
+        for string in self.test_strings:
+            consume(unescaped_split(',', string))
+            consume(unescaped_split(';', string, remove_empty_matches=True))
+
+    def time_multi_pattern_search_for(self):
+        for pattern in self.multi_patterns:
+            consume(search_for(pattern, self.multi_pattern_string,
+                               use_regex=True))
+            consume(unescaped_search_for(pattern, self.multi_pattern_string,
+                                         use_regex=True))
+
+    def time_search_in_between(self):
+        for string in self.test_strings:
+            consume(search_in_between("'", "'", string))
+            consume(unescaped_search_in_between("'", "'", string))
+
+    def time_nested_search_in_between(self):
+        for string in self.in_between_strings:
+            consume(nested_search_in_between('(', ')', string))
+            consume(unescaped_nested_search_in_between('(', ')', string))
+
+    def time_escaping(self):
+        for string in self.test_strings:
+            unescape(escape(string, "'\\"))
+            unescaped_strip(string)
+
+
+class SearchFor:
+    params = (SIZES, DENSITIES)
+    param_names = ('size', 'match_density')
+
+    def setup(self, size, match_density):
+        self.text = make_text(size, match_density, 0.01)
+
+    def time_search_for(self, size, match_density):
+        consume(search_for(',', self.text))
+
+    def time_unescaped_search_for(self, size, match_density):
+        consume(unescaped_search_for(',', self.text))
+
+
+class Split:
+    params = (SIZES, DENSITIES)
+    param_names = ('size', 'escape_density')
+
+    def setup(self, size, escape_density):
+        self.text = make_text(size, 0.01, escape_density)
+
+    def time_split(self, size, escape_density):
+        consume(split(',', self.text))
+
+    def time_unescaped_split(self, size, escape_density):
+        consume(unescaped_split(',', self.text))
+
+
+class SearchInBetween:
+    params = (SIZES, DENSITIES)
+    param_names = ('size', 'escape_density')
+
+    def setup(self, size, escape_density):
+        self.text = make_text(size, 0.01, escape_density, separator="'")
+
+    def time_search_in_between(self, size, escape_density):
+        consume(search_in_between("'", "'", self.text))
+
+    def time_unescaped_search_in_between(self, size, escape_density):
+        consume(unescaped_search_in_between("'", "'", self.text))
+
+
+class NestedSearch:
+    params = (SIZES, [1, 10, 100])
+    param_names = ('size', 'depth')
+
+    def setup(self, size, depth):
+        self.text = make_nested(size, depth)
+
+    def time_nested_search_in_between(self, size, depth):
+        consume(nested_search_in_between('(', ')', self.text))
+
+    def time_unescaped_nested_search_in_between(self, size, depth):
+        consume(unescaped_nested_search_in_between('(', ')', self.text))
+
+    def time_nested_search_in_between_all_levels(self, size, depth):
+        # Acquiring all levels by reinvoking the search on each match.
+        matches = list(nested_search_in_between('(', ')', self.text))
+        while matches:
+            matches = [inner
+                       for match in matches
+                       for inner in nested_search_in_between(
+                           '(', ')', str(match.inside))]
+
+    def time_nested_search_tree(self, size, depth):
+        consume(nested_search_tree('(', ')', self.text))
+
+
+class ParallelSearchFor:
+    """
+    Measures how ``parallel_search_for()`` scales with the number of workers.
+    """
+    params = ([MB, 100 * MB], [1, 2, 4, 8, 16])
+    param_names = ('size', 'workers')
+
+    def setup(self, size, workers):
+        if workers > (os.cpu_count() or 1):
+            raise NotImplementedError('Not enough CPUs.')
+        self.text = make_text(size, 0.01)
+
+    def time_parallel_search_for(self, size, workers):
+        consume(parallel_search_for(',', self.text, workers=workers,
+                                    chunk_size=size // (4 * workers) or 1))
@@ -0,0 +1,82 @@
+import asyncio
+import os
+import platform
+
+from coala_utils.ContextManagers import KILL_SIGNALS, _send_signal
+from coala_utils.MutableValue import MutableValue
+
+
+class async_subprocess_timeout:
+    """
+    Asynchronous context manager killing an ``asyncio.subprocess.Process`` if
+    it takes more than the timeout. It uses timers of the event loop, so no
+    thread is needed.
+
+    The process is interrupted with ``SIGINT`` first. If it's still running
+    after the first grace period it gets ``SIGTERM``, and ``SIGKILL`` after
+    the second one:
+
+    >>> import asyncio, sys
+    >>> async def run():
+    ...     process = await asyncio.create_subprocess_exec(
+    ...         sys.executable, '-c', 'import time; time.sleep(10)')
+    ...     async with async_subprocess_timeout(process, 0.1) as timedout:
+    ...         await process.wait()
+    ...     return timedout.value
+    >>> asyncio.new_event_loop().run_until_complete(run())
+    True
+    """
+
+    def __init__(self, process, seconds, kill_pg=False, grace_periods=(5, 5)):
+        """
+        :param process:       The ``asyncio.subprocess.Process`` to supervise.
+        :param seconds:       The number of seconds to allow the process to
+                              run for. If set to 0 or a negative value, it
+                              waits indefinitely.
+        :param kill_pg:       Boolean whether to kill the process group or only
+                              this process. (not applicable for windows)
+        :param grace_periods: The number of seconds to wait after sending each
+                              signal of ``KILL_SIGNALS`` before sending the
+                              next one. Pass an empty tuple to only send
+                              ``SIGINT``.
+        """
+        self.process = process
+        self.seconds = seconds
+        self.kill_pg = kill_pg and platform.system() != 'Windows'
+        self.grace_periods = tuple(grace_periods)
+        self.timedout = MutableValue(False)
+        self._pgid = None
+        self._handle = None
+
+    async def __aenter__(self):
+        if self.seconds > 0:
+            self._handle = asyncio.get_event_loop().call_later(
+                self.seconds, self._kill, 0)
+        return self.timedout
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def _kill(self, stage):
+        if self.process.returncode is not None:
+            return
+
+        if stage == 0:
+            self.timedout.value = True
+            if self.kill_pg:  # pragma Windows: no cover
+                try:
+                    self._pgid = os.getpgid(self.process.pid)
+                except ProcessLookupError:
+                    # The process was reaped, but its return code wasn't
+                    # set yet.
+                    return
+
+        _send_signal(self.process.pid, self._pgid, KILL_SIGNALS[stage])
+
+        if stage < min(len(self.grace_periods), len(KILL_SIGNALS) - 1):
+            self._handle = asyncio.get_event_loop().call_later(
+                self.grace_periods[stage], self._kill, stage + 1)
+        else:
+            self._handle = None
@@ -1,57 +1,313 @@
 import builtins
+import heapq
+import itertools
 import os
 import platform
+import shutil
 import signal
 import sys
 import threading
-from contextlib import closing, contextmanager
+import time
+import traceback
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, closing, contextmanager, suppress
 from io import StringIO
+from tempfile import mkdtemp
+
+try:
+    from contextvars import ContextVar
+except ImportError:  # pragma Python 3.7,3.8,3.9,3.10,3.11,3.12: no cover
+    class ContextVar:
+        """
+        A minimal replacement for ``contextvars.ContextVar`` (added in Python
+        3.7) holding a value per thread.
+        """
+
+        def __init__(self, name, default=None):
+            self.name = name
+            self._default = default
+            self._local = threading.local()
+
+        def get(self):
+            return getattr(self._local, 'value', self._default)
+
+        def set(self, value):
+            token = self.get()
+            self._local.value = value
+            return token
+
+        def reset(self, token):
+            self._local.value = token
 
 from coala_utils.MutableValue import MutableValue
-from coala_utils.FileUtils import create_tempfile
+from coala_utils.FileUtils import create_tempfile, get_memory_tempdir
 
 
-@contextmanager
-def subprocess_timeout(sub_process, seconds, kill_pg=False):
+class _Watchdog:
     """
-    Kill subprocess if the sub process takes more the than the timeout.
+    A single thread invoking callbacks at their deadlines, shared by all
+    active ``subprocess_timeout`` contexts instead of starting a thread for
+    each of them. The thread is started on demand and exits when there are
+    no deadlines left.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._deadlines = []
+        self._counter = itertools.count()
+        self._cancelled = 0
+        self._thread = None
+
+    def schedule(self, seconds, callback):
+        """
+        Schedules a callback.
+
+        :param seconds:  The number of seconds after which the callback is
+                         invoked.
+        :param callback: The function to invoke. It's invoked while holding
+                         the lock of the watchdog, so ``cancel()`` doesn't
+                         return before a running callback has finished.
+                         Exceptions it raises are printed to stderr.
+        :return:         An entry which can be passed to ``cancel()``.
+        """
+        entry = [time.monotonic() + seconds, next(self._counter), callback]
+        with self._condition:
+            heapq.heappush(self._deadlines, entry)
+            if self._thread is None:
+                self._thread = threading.Thread(name='timeout-watchdog',
+                                                target=self._run,
+                                                daemon=True)
+                self._thread.start()
+            elif self._deadlines[0] is entry:
+                self._condition.notify()
+        return entry
+
+    def cancel(self, entry):
+        """
+        Cancels a scheduled callback if it wasn't invoked yet.
+
+        :param entry: The entry returned by ``schedule()``, or a
+                      ``MutableValue`` holding it. The holder is read while
+                      holding the lock of the watchdog, so callbacks can
+                      reschedule themselves by replacing its value.
+        """
+        with self._condition:
+            if isinstance(entry, MutableValue):
+                entry = entry.value
+            if entry[2] is None:
+                return
 
-    :param sub_process: The sub process to run.
-    :param seconds:     The number of seconds to allow the test to run for. If
-                        set to 0 or a negative value, it waits indefinitely.
-                        Floats can be used to specify units smaller than
-                        seconds.
-    :param kill_pg:     Boolean whether to kill the process group or only this
-                        process. (not applicable for windows)
+            entry[2] = None
+            self._cancelled += 1
+            # Cancelled entries are only dropped when reaching their deadline,
+            # so the heap is rebuilt once they make up most of it.
+            if self._cancelled > 64 and 2 * self._cancelled > len(
+                    self._deadlines):
+                self._deadlines = [item for item in self._deadlines
+                                   if item[2] is not None]
+                heapq.heapify(self._deadlines)
+                self._cancelled = 0
+
+    def _run(self):
+        with self._condition:
+            try:
+                while True:
+                    while self._deadlines and self._deadlines[0][2] is None:
+                        heapq.heappop(self._deadlines)
+                        self._cancelled -= 1
+
+                    if not self._deadlines:
+                        return
+
+                    entry = self._deadlines[0]
+                    remaining = entry[0] - time.monotonic()
+                    if remaining > 0:
+                        self._condition.wait(remaining)
+                        continue
+
+                    heapq.heappop(self._deadlines)
+                    callback, entry[2] = entry[2], None
+                    try:
+                        callback()
+                    except Exception:
+                        # The thread is shared, a failing callback must not
+                        # stop the other timeouts.
+                        traceback.print_exc()
+            finally:
+                self._thread = None
+
+
+_watchdog = _Watchdog()
+
+# The signals sent to a timed out process, escalating after grace periods.
+# Windows has no SIGKILL, ``os.kill()`` terminates the process there anyway.
+KILL_SIGNALS = (signal.SIGINT,
+                signal.SIGTERM,
+                getattr(signal, 'SIGKILL', signal.SIGTERM))
+
+
+def _send_signal(pid, pgid, signum):
     """
-    timedout = MutableValue(False)
+    Sends a signal to a process and optionally its process group, ignoring
+    processes that don't exist anymore.
+
+    :param pid:    The id of the process.
+    :param pgid:   The id of its process group or None to signal only the
+                   process.
+    :param signum: The signal to send.
+    """
+    with suppress(ProcessLookupError):
+        os.kill(pid, signum)
 
-    if seconds <= 0:
-        yield timedout
+    if pgid is not None:  # pragma Windows: no cover
+        with suppress(ProcessLookupError):
+            os.killpg(pgid, signum)
+
+
+# The resource usage of a process reaped by ``subprocess_timeout``. The times
+# are given in seconds, the peak resident set size in bytes. All but the wall
+# time are None if the usage couldn't be retrieved.
+ProcessUsage = namedtuple('ProcessUsage',
+                          'wall_time, user_time, system_time, max_rss')
+
+# ``ru_maxrss`` is given in kilobytes, except on macOS.
+_MAX_RSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+
+@contextmanager
+def _record_usage(sub_process, usage):
+    """
+    Records the resource usage of a process reaped within the context.
+
+    The usage can only be retrieved when reaping the process, so the
+    ``Popen`` object is made to reap it with ``os.wait4()`` instead of
+    ``os.waitpid()`` by replacing its internal ``_try_wait()`` method, which
+    is used by ``wait()`` and ``communicate()``. Only the wall time is
+    available if the process was reaped by ``poll()`` or on Windows.
+
+    :param sub_process: The ``Popen`` object of the process.
+    :param usage:       A ``MutableValue`` the ``ProcessUsage`` is stored in
+                        when leaving the context. If None, nothing is
+                        recorded.
+    """
+    if usage is None:
+        yield
         return
 
-    finished = threading.Event()
+    start = time.monotonic()
+    reaped = []
+    wait4 = getattr(os, 'wait4', None)
+    if wait4 is not None:  # pragma Windows: no cover
+        def _try_wait(wait_flags):
+            try:
+                pid, status, resources = wait4(sub_process.pid, wait_flags)
+            except ChildProcessError:
+                return sub_process.pid, 0
+
+            if pid:
+                reaped.append((time.monotonic(), resources))
+            return pid, status
+
+        sub_process._try_wait = _try_wait
+    else:  # pragma posix: no cover
+        # Only the wall time is recorded without ``os.wait4()``.
+        pass
+
+    try:
+        yield
+    finally:
+        vars(sub_process).pop('_try_wait', None)
+
+        if reaped:
+            end, resources = reaped[0]
+            usage.value = ProcessUsage(end - start,
+                                       resources.ru_utime,
+                                       resources.ru_stime,
+                                       resources.ru_maxrss * _MAX_RSS_UNIT)
+        else:
+            usage.value = ProcessUsage(time.monotonic() - start,
+                                       None, None, None)
+
+
+@contextmanager
+def subprocess_timeout(sub_process, seconds, kill_pg=False,
+                       grace_periods=(5, 5), usage=None):
+    """
+    Kill subprocess if the sub process takes more the than the timeout.
+
+    The process is interrupted with ``SIGINT`` first. If it's still running
+    after the first grace period it gets ``SIGTERM``, and ``SIGKILL`` after
+    the second one. The deadlines of all active contexts are handled by a
+    single shared thread, so supervising many processes concurrently doesn't
+    require a thread for each of them.
+
+    The resource usage of the process can be recorded as well:
+
+    >>> import subprocess, sys
+    >>> process = subprocess.Popen([sys.executable, '-c', ''])
+    >>> usage = MutableValue()
+    >>> with subprocess_timeout(process, 10, usage=usage) as timedout:
+    ...     returncode = process.wait()
+    >>> timedout.value
+    False
+    >>> usage.value
+    ProcessUsage(wall_time=..., user_time=..., system_time=..., max_rss=...)
+
+    :param sub_process:   The sub process to run.
+    :param seconds:       The number of seconds to allow the test to run for.
+                          If set to 0 or a negative value, it waits
+                          indefinitely. Floats can be used to specify units
+                          smaller than seconds.
+    :param kill_pg:       Boolean whether to kill the process group or only
+                          this process. (not applicable for windows)
+    :param grace_periods: The number of seconds to wait after sending each
+                          signal of ``KILL_SIGNALS`` before sending the next
+                          one. Pass an empty tuple to only send ``SIGINT``.
+    :param usage:         A ``MutableValue`` to store the ``ProcessUsage`` of
+                          the process in when leaving the context. The wall
+                          time is measured from entering the context until
+                          the process is reaped.
+    """
+    timedout = MutableValue(False)
+    grace_periods = tuple(grace_periods)
 
     if platform.system() == "Windows":  # pragma posix: no cover
         kill_pg = False
 
-    def kill_it():
-        finished.wait(seconds)
-        if not finished.is_set():
+    pgid = None
+    entry = MutableValue()
+
+    def kill_it(stage=0):
+        nonlocal pgid
+
+        if stage == 0:
             timedout.value = True
-            if kill_pg:  # pragma Windows: no cover
-                pgid = os.getpgid(sub_process.pid)
-            os.kill(sub_process.pid, signal.SIGINT)
-            if kill_pg:  # pragma Windows: no cover
-                os.killpg(pgid, signal.SIGINT)
+            try:
+                pgid = os.getpgid(sub_process.pid) if kill_pg else None
+            except ProcessLookupError:
+                # The process was already reaped, the shared thread must not
+                # die because of that.
+                return
+        elif sub_process.returncode is not None:
+            return
 
-    thread = threading.Thread(name='timeout-killer', target=kill_it)
-    try:
-        thread.start()
-        yield timedout
-    finally:
-        finished.set()
-        thread.join()
+        _send_signal(sub_process.pid, pgid, KILL_SIGNALS[stage])
+
+        if stage < min(len(grace_periods), len(KILL_SIGNALS) - 1):
+            entry.value = _watchdog.schedule(grace_periods[stage],
+                                             lambda: kill_it(stage + 1))
+
+    with _record_usage(sub_process, usage):
+        if seconds <= 0:
+            yield timedout
+            return
+
+        entry.value = _watchdog.schedule(seconds, kill_it)
+        try:
+            yield timedout
+        finally:
+            _watchdog.cancel(entry)
 
 
 @contextmanager
@@ -91,7 +347,77 @@ def suppress_stdout():
         yield
 
 
+class _DispatchingStream:
+    """
+    Replaces ``sys.stdout`` or ``sys.stderr`` while output is retrieved.
+    Writes go to the stream set in a context variable for the current thread
+    or task, or to the replaced stream if there is none.
+    """
+
+    def __init__(self, target, fallback):
+        """
+        :param target:   The context variable holding the stream to write to.
+        :param fallback: The replaced stream.
+        """
+        self._get_target = target.get
+        self._fallback = fallback
+
+    def _stream(self):
+        stream = self._get_target()
+        return self._fallback if stream is None else stream
+
+    def write(self, string):
+        # Inlined ``_stream()``, as this is called for every write.
+        stream = self._get_target()
+        if stream is None:
+            stream = self._fallback
+        return stream.write(string)
+
+    def flush(self):
+        return self._stream().flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream(), name)
+
+
+_stdout_target = ContextVar('stdout_target', default=None)
+_stderr_target = ContextVar('stderr_target', default=None)
+_retrieving = {'stdout': 0, 'stderr': 0}
+_retrieving_lock = threading.Lock()
+
+
 @contextmanager
+def _retrieve(name, target):
+    """
+    Retrieves the output written to ``sys.<name>`` in the current context.
+
+    A single ``_DispatchingStream`` is installed while any context retrieves
+    output, other threads and tasks keep writing to the original stream.
+
+    :param name:   ``'stdout'`` or ``'stderr'``.
+    :param target: The context variable of the stream.
+    :return:       A context manager yielding the StringIO object.
+    """
+    with closing(StringIO()) as sio:
+        with _retrieving_lock:
+            stream = getattr(sys, name)
+            if not isinstance(stream, _DispatchingStream):
+                setattr(sys, name, _DispatchingStream(target, stream))
+            _retrieving[name] += 1
+
+        token = target.set(sio)
+        try:
+            yield sio
+        finally:
+            target.reset(token)
+            with _retrieving_lock:
+                _retrieving[name] -= 1
+                stream = getattr(sys, name)
+                if (not _retrieving[name] and
+                        isinstance(stream, _DispatchingStream)):
+                    setattr(sys, name, stream._fallback)
+
+
 def retrieve_stdout():
     """
     Yields a StringIO object from which one can read everything that was
@@ -102,23 +428,13 @@ def retrieve_stdout():
     with retrieve_stdout() as stdout:
         print("something")  # Won't print to the console
         what_was_printed = stdout.getvalue()  # Save the value
-    """
-    with closing(StringIO()) as sio, replace_stdout(sio):
-        oldprint = builtins.print
-        try:
-            # Overriding stdout doesn't work with libraries, this ensures even
-            # cached variables take this up. Well... it works.
-            def newprint(*args, **kwargs):
-                kwargs['file'] = sio
-                oldprint(*args, **kwargs)
 
-            builtins.print = newprint
-            yield sio
-        finally:
-            builtins.print = oldprint
+    Only the output of the current thread (or asyncio task) is retrieved, so
+    multiple threads can retrieve their output independently.
+    """
+    return _retrieve('stdout', _stdout_target)
 
 
-@contextmanager
 def retrieve_stderr():
     """
     Yields a StringIO object from which one can read everything that was
@@ -127,22 +443,149 @@ def retrieve_stderr():
     Example usage:
 
     with retrieve_stderr() as stderr:
-        print("something")  # Won't print to the console
+        print("something", file=sys.stderr)  # Won't print to the console
         what_was_printed = stderr.getvalue()  # Save the value
+
+    Only the output of the current thread (or asyncio task) is retrieved, so
+    multiple threads can retrieve their output independently.
     """
-    with closing(StringIO()) as sio, replace_stderr(sio):
-        oldprint = builtins.print
-        try:
-            # Overriding stderr doesn't work with libraries, this ensures even
-            # cached variables take this up. Well... it works.
-            def newprint(*args, **kwargs):
-                kwargs['file'] = sio
-                oldprint(*args, **kwargs)
+    return _retrieve('stderr', _stderr_target)
 
-            builtins.print = newprint
-            yield sio
-        finally:
-            builtins.print = oldprint
+
+class CapturedOutput:
+    """
+    The output captured by ``retrieve_fd_output``. If it exceeds the maximum
+    size, only its beginning and end are kept.
+    """
+
+    def __init__(self, max_size=None):
+        """
+        :param max_size: The maximum number of bytes to keep, half of them
+                         from the beginning and half of them from the end of
+                         the output. If None, everything is kept.
+        """
+        self.size = 0
+        self._head = bytearray()
+        self._head_size = None if max_size is None else max_size // 2
+        self._tail = deque()
+        self._tail_length = 0
+        self._tail_size = None if max_size is None else max_size - (
+            max_size // 2)
+
+    @property
+    def dropped(self):
+        """
+        The number of bytes dropped from the middle of the output.
+        """
+        return self.size - len(self._head) - min(self._tail_length,
+                                                 self._tail_size or 0)
+
+    def write(self, data):
+        self.size += len(data)
+        if self._head_size is None:
+            self._head += data
+            return
+
+        if len(self._head) < self._head_size:
+            missing = self._head_size - len(self._head)
+            self._head += data[:missing]
+            data = data[missing:]
+
+        if data:
+            self._tail.append(data)
+            self._tail_length += len(data)
+            while (self._tail and
+                   self._tail_length - len(self._tail[0]) >= self._tail_size):
+                self._tail_length -= len(self._tail.popleft())
+
+    def getvalue(self):
+        """
+        :return: The kept output as bytes, the beginning and end of the output
+                 are joined directly if something was dropped in between.
+        """
+        tail = b''.join(self._tail)
+        if self._tail_size is not None:
+            tail = tail[max(0, len(tail) - self._tail_size):]
+        return bytes(self._head) + tail
+
+
+def _flush_standard_streams():
+    for stream in (sys.stdout, sys.stderr, sys.__stdout__, sys.__stderr__):
+        # They may be None or closed.
+        with suppress(AttributeError, ValueError):
+            stream.flush()
+
+
+@contextmanager
+def retrieve_fd_output(fd=1, max_size=None, callback=None, chunk_size=65536):
+    """
+    Captures everything written to a file descriptor, including the output of
+    C extensions and child processes. The file descriptor is redirected to a
+    pipe drained by a separate thread.
+
+    >>> with retrieve_fd_output(max_size=8) as output:
+    ...     _ = os.write(1, b'0123456789')
+    >>> output.getvalue(), output.dropped
+    (b'01236789', 2)
+
+    Python level streams writing to the file descriptor are flushed when
+    entering and leaving the context. Child processes writing to it must have
+    exited before the context is left, as leaving waits until the pipe is
+    closed.
+
+    :param fd:         The file descriptor to capture, 1 for stdout and 2 for
+                       stderr.
+    :param max_size:   The maximum number of bytes to keep, see
+                       ``CapturedOutput``. If None, everything is kept.
+    :param callback:   A function invoked with each chunk of bytes read, e.g.
+                       to stream the output somewhere else. It's invoked from
+                       the reading thread. If it raises, it's not invoked
+                       anymore and the exception is raised when leaving the
+                       context.
+    :param chunk_size: The maximum number of bytes read at once.
+    :return:           A context manager yielding the ``CapturedOutput``. It
+                       is complete once the context is left.
+    """
+    output = CapturedOutput(max_size)
+    _flush_standard_streams()
+
+    read_end, write_end = os.pipe()
+    saved_fd = os.dup(fd)
+    try:
+        os.dup2(write_end, fd)
+    finally:
+        os.close(write_end)
+
+    errors = []
+
+    def read():
+        with open(read_end, 'rb', buffering=0) as pipe:
+            while True:
+                data = pipe.read(chunk_size)
+                if not data:
+                    break
+                if callback is not None and not errors:
+                    try:
+                        callback(data)
+                    except BaseException as exception:
+                        # The pipe has to be drained anyway, else the writers
+                        # would block.
+                        errors.append(exception)
+                output.write(data)
+
+    thread = threading.Thread(name='fd-reader', target=read, daemon=True)
+    thread.start()
+    try:
+        yield output
+    finally:
+        _flush_standard_streams()
+        # Closes the last write end of the pipe, so the thread gets EOF.
+        os.dup2(saved_fd, fd)
+        os.close(saved_fd)
+        thread.join()
+
+    if errors:
+        raise errors[0]
 
 
 @contextmanager
@@ -191,13 +634,17 @@ def simulate_console_inputs(*inputs):
 
 
 @contextmanager
-def make_temp(suffix="", prefix="tmp", dir=None):
+def make_temp(suffix="", prefix="tmp", dir=None, in_memory=False):
     """
     Creates a temporary file with a closed stream and deletes it when done.
 
-    :return: A contextmanager retrieving the file path.
+    :param in_memory: Whether to create the file in a memory backed file
+                      system, see ``create_tempfile``. The file has a regular
+                      path usable by child processes as well.
+    :return:          A contextmanager retrieving the file path.
     """
-    tempfile = create_tempfile(suffix=suffix, prefix=prefix, dir=dir)
+    tempfile = create_tempfile(suffix=suffix, prefix=prefix, dir=dir,
+                               in_memory=in_memory)
     try:
         yield tempfile
     finally:
@@ -218,7 +665,8 @@ def prepare_file(lines,
     :param filename:         The filename to be prepared.
     :param force_linebreaks: Whether to append newlines at each line if needed.
     :param create_tempfile:  Whether to save lines in tempfile if needed.
-    :param tempfile_kwargs:  Kwargs passed to tempfile.mkstemp().
+    :param tempfile_kwargs:  Kwargs passed to ``make_temp()``, e.g.
+                             ``{'in_memory': True}``.
     """
     if force_linebreaks:
         lines = type(lines)(line if line.endswith('\n') else line + '\n'
@@ -236,8 +684,102 @@ def prepare_file(lines,
         yield lines, filename
 
 
+def _join_lines(lines, force_linebreaks):
+    if isinstance(lines, str):
+        # Splitting the string would also split at form feeds and the like.
+        if force_linebreaks and lines and not lines.endswith('\n'):
+            return lines + '\n'
+        return lines
+    if not force_linebreaks:
+        return ''.join(lines)
+    if not lines:
+        return ''
+    return '\n'.join(line[:-1] if line.endswith('\n') else line
+                     for line in lines) + '\n'
+
+
+@contextmanager
+def prepare_files(files,
+                  force_linebreaks=True,
+                  dir=None,
+                  in_memory=False,
+                  workers=1):
+    """
+    Creates many files in a single temporary directory, which is removed with
+    everything in it when done.
+
+    >>> with prepare_files({'a.py': ['import b'],
+    ...                     'sub/b.py': 'x = 1\\n'}) as (directory, paths):
+    ...     with open(paths['a.py']) as file:
+    ...         print(file.read(), end='')
+    ...     os.path.relpath(paths['sub/b.py'], directory)
+    import b
+    'sub/b.py'
+    >>> os.path.exists(directory)
+    False
+
+    :param files:            A dict mapping file names relative to the
+                             temporary directory to the lines of the files (or
+                             their contents as a string). Missing
+                             subdirectories are created.
+    :param force_linebreaks: Whether to append newlines at each line if
+                             needed.
+    :param dir:              The directory to create the temporary directory
+                             in.
+    :param in_memory:        Whether to create the temporary directory in a
+                             memory backed file system if no ``dir`` is
+                             given, see ``create_tempfile``.
+    :param workers:          The number of threads writing the files.
+    :raises ValueError:      Raised if a file name points outside of the
+                             temporary directory.
+    :return:                 A context manager yielding the path of the
+                             temporary directory and a dict mapping the given
+                             file names to their absolute paths.
+    """
+    paths = {}
+    for name in files:
+        path = os.path.normpath(name)
+        if os.path.isabs(path) or path.split(os.sep)[0] == os.pardir:
+            raise ValueError('{!r} is not a relative path inside the '
+                             'temporary directory.'.format(name))
+        paths[name] = path
+
+    if in_memory and dir is None:
+        dir = get_memory_tempdir()
+    directory = mkdtemp(dir=dir)
+    try:
+        for subdirectory in {os.path.dirname(path)
+                             for path in paths.values()} - {''}:
+            os.makedirs(os.path.join(directory, subdirectory), exist_ok=True)
+
+        paths = {name: os.path.join(directory, path)
+                 for name, path in paths.items()}
+
+        def write(name):
+            with open(paths[name], 'w', encoding='utf-8') as file:
+                file.write(_join_lines(files[name], force_linebreaks))
+
+        if workers > 1:
+            with ThreadPoolExecutor(workers) as executor:
+                # Iterating the results raises the first error.
+                for _ in executor.map(write, paths):
+                    pass
+        else:
+            for name in paths:
+                write(name)
+
+        yield directory, paths
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
 @contextmanager
 def change_directory(path):
+    """
+    Changes the working directory of the whole process while the context is
+    active. Use ``change_local_directory`` to change it only for the current
+    thread or task.
+    """
     old_dir = os.getcwd()
     os.chdir(path)
     try:
@@ -246,16 +788,244 @@ def change_directory(path):
         os.chdir(old_dir)
 
 
+_LocalDirectory = namedtuple('_LocalDirectory', 'path, fd')
+_local_directory = ContextVar('local_directory', default=None)
+# Path-like objects were added in Python 3.6.
+_fspath = getattr(os, 'fspath', lambda path: path)
+
+
+def get_local_directory():
+    """
+    Retrieves the working directory of the current thread or task, as set by
+    ``change_local_directory``.
+
+    :return: The absolute path of the directory, the working directory of the
+             process if none was set.
+    """
+    local = _local_directory.get()
+    return os.getcwd() if local is None else local.path
+
+
+def resolve_local_path(path):
+    """
+    Resolves a path relative to the working directory of the current thread
+    or task.
+
+    :param path: The path to resolve as string, bytes or path-like object.
+                 Absolute paths are returned unchanged.
+    :return:     The resolved path, as bytes if ``path`` is bytes.
+    """
+    path = _fspath(path)
+    directory = get_local_directory()
+    if isinstance(path, bytes):
+        directory = os.fsencode(directory)
+    return os.path.join(directory, path)
+
+
+@contextmanager
+def change_local_directory(path):
+    """
+    Changes the working directory only for the current thread or task, so
+    parallel threads can each work in their own directory. Unlike
+    ``os.chdir()``, this doesn't affect the process, so the paths have to be
+    resolved with ``resolve_local_path`` or opened with ``open_local``:
+
+    >>> with prepare_files({'sub/file': 'content'}) as (directory, _):
+    ...     with change_local_directory(directory):
+    ...         with change_local_directory('sub') as sub:
+    ...             sub == os.path.join(directory, 'sub')
+    ...             with open_local('file') as file:
+    ...                 file.read()
+    True
+    'content\\n'
+
+    Where supported, a file descriptor of the directory is kept open while
+    the context is active, so ``open_local`` can open files relative to it
+    without resolving the path of the directory again.
+
+    Only asyncio tasks created inside the context inherit the directory, and
+    the context must not be left while they still use it. Threads started
+    inside the context see the working directory of the process, so they have
+    to enter ``change_local_directory`` themselves.
+
+    :param path: The directory, relative paths are resolved relative to the
+                 current local working directory.
+    :return:     A context manager yielding the absolute path of the
+                 directory.
+    """
+    path = os.path.abspath(os.fsdecode(resolve_local_path(path)))
+    with ExitStack() as stack:
+        if os.open in os.supports_dir_fd:  # pragma Windows: no cover
+            fd = os.open(path, os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0))
+            stack.callback(os.close, fd)
+        else:  # pragma posix: no cover
+            if not os.path.isdir(path):
+                raise NotADirectoryError(path)
+            fd = None
+
+        token = _local_directory.set(_LocalDirectory(path, fd))
+        try:
+            yield path
+        finally:
+            _local_directory.reset(token)
+
+
+def open_local(file, mode='r', *args, **kwargs):
+    """
+    Opens a file relative to the working directory of the current thread or
+    task, as set by ``change_local_directory``. Takes the same arguments as
+    ``open()``.
+
+    :return: The file object.
+    """
+    local = _local_directory.get()
+    if isinstance(file, int):
+        return open(file, mode, *args, **kwargs)
+
+    file = _fspath(file)
+    if os.path.isabs(file) or local is None:
+        return open(file, mode, *args, **kwargs)
+
+    if local.fd is None:  # pragma posix: no cover
+        return open(resolve_local_path(file), mode, *args, **kwargs)
+
+    def opener(path, flags):  # pragma Windows: no cover
+        return os.open(path, flags, dir_fd=local.fd)
+
+    return open(file, mode, *args, opener=opener, **kwargs)
+
+
+class _LazyFilePool:
+    """
+    Keeps the files of lazily opened ``_LazyFile`` objects open, at most
+    ``max_open`` at once. The least recently used file is closed when
+    another one needs to be opened.
+    """
+
+    def __init__(self, max_open=None):
+        self.max_open = max_open
+        self._open = OrderedDict()
+
+    def acquire(self, lazy_file):
+        file = self._open.get(lazy_file)
+        if file is not None:
+            self._open.move_to_end(lazy_file)
+            return file
+
+        if self.max_open is not None and len(self._open) >= self.max_open:
+            self._open.popitem(last=False)[0]._suspend()
+
+        file = self._open[lazy_file] = lazy_file._reopen()
+        return file
+
+    def release(self, lazy_file):
+        file = self._open.pop(lazy_file, None)
+        if file is not None:
+            file.close()
+
+
+class _LazyFile:
+    """
+    A file that is only opened when it's used. It may be closed in between
+    by its ``_LazyFilePool``, it's reopened at the same position then.
+    """
+
+    def __init__(self, pool, name, mode):
+        self._pool = pool
+        self.name = name
+        self.mode = mode
+        self.closed = False
+        self._file = None
+        self._position = None
+        self._opened = False
+
+    def _reopen(self):
+        mode = self.mode
+        if self._opened and ('w' in mode or 'x' in mode):
+            # Don't truncate the file again.
+            mode = 'r+' + ''.join(char for char in mode if char not in 'wx+')
+        self._file = open(self.name, mode)
+        self._opened = True
+        if self._position is not None:
+            self._file.seek(self._position)
+        return self._file
+
+    def _suspend(self):
+        # Appending files don't need to remember their position.
+        if 'a' not in self.mode:
+            self._position = self._file.tell()
+        self._file.close()
+        self._file = None
+
+    def close(self):
+        if not self.closed:
+            self._pool.release(self)
+            self._file = None
+            self.closed = True
+
+    def __getattr__(self, name):
+        if self.closed:
+            raise ValueError('I/O operation on closed file.')
+        return getattr(self._pool.acquire(self), name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        # Iterating the file itself would prevent ``tell()``.
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+
 @contextmanager
-def open_files(*args):
+def open_files(*args, lazy=False, max_open=None):
     """
     Handle opening and closing for multiple files at once.
 
-    :param args: Tuples with the format ``(filename, mode)``.
+    With ``lazy=True``, files are only opened when they are used, and at most
+    ``max_open`` of them are kept open at the same time. This allows handling
+    more files than the limit of open file descriptors:
+
+    >>> with prepare_files({str(i): [] for i in range(3)}) as (_, paths):
+    ...     with open_files(*((paths[str(i)], 'w') for i in range(3)),
+    ...                     lazy=True, max_open=2) as files:
+    ...         for i in range(4):
+    ...             for file in files:
+    ...                 _ = file.write(str(i))
+    ...     with open(paths['0']) as file:
+    ...         file.read()
+    '0123'
+
+    Lazily opened files that were closed in between are reopened at their
+    previous position, so they have to be regular files.
+
+    :param args:        Tuples with the format ``(filename, mode)``.
+    :param lazy:        Whether to open the files on first use.
+    :param max_open:    The maximum number of files open at the same time in
+                        lazy mode. If None, all of them may be open.
+    :raises ValueError: Raised if ``max_open`` is less than 1.
+    :return:            A context manager yielding a tuple of the files.
     """
-    files = []
-    for (file, mode) in args:
-        files.append(open(file, mode))
-    yield tuple(files)
-    for file in files:
-        file.close()
+    if max_open is not None and max_open < 1:
+        raise ValueError('max_open must be positive.')
+
+    if lazy:
+        pool = _LazyFilePool(max_open)
+        files = tuple(_LazyFile(pool, file, mode) for file, mode in args)
+        try:
+            yield files
+        finally:
+            for file in files:
+                file.close()
+    else:
+        with ExitStack() as stack:
+            yield tuple(stack.enter_context(open(file, mode))
+                        for file, mode in args)
@@ -5,6 +5,9 @@ import os
 # On Windows imports readline from pyreadline
 import readline
 
+from coala_utils.ContextManagers import (
+    change_local_directory, get_local_directory)
+
 
 def sorted_glob(glob_str):
     """
@@ -15,10 +18,16 @@ def sorted_glob(glob_str):
 
 def path_completer(text, state):
     """
-    Completer method for system paths.
+    Completer method for system paths. Relative paths are completed relative
+    to the local working directory (see ``change_local_directory``).
     """
-    return [x if os.path.isfile(x) else (x + os.sep)
-            for x in sorted_glob(text + '*')][state]
+    directory = os.path.join(get_local_directory(), '')
+    pattern = text + '*'
+    if not os.path.isabs(text):
+        pattern = glob.escape(directory) + pattern
+    return [(x if os.path.isabs(text) else x[len(directory):]) +
+            ('' if os.path.isfile(x) else os.sep)
+            for x in sorted_glob(pattern)][state]
 
 
 class FilePathCompleter:
@@ -50,8 +59,10 @@ class FilePathCompleter:
             filepaths will be suggested and completed.
         """
         readline.set_completer_delims(self.delimiters)
-        self.initial_dir = os.getcwd()
-        os.chdir(seed_dir)
+        # The working directory of the process is left alone, so other
+        # threads aren't affected.
+        self._seed_dir = change_local_directory(seed_dir)
+        self._seed_dir.__enter__()
         for key in self.bind_keys:
             readline.parse_and_bind("{}: complete".format(key))
         readline.set_completer(self.completion_method)
@@ -60,4 +71,4 @@ class FilePathCompleter:
         for key in self.bind_keys:
             readline.parse_and_bind("{}: self-insert".format(key))
         readline.set_completer()
-        os.chdir(self.initial_dir)
+        self._seed_dir.__exit__(None, None, None)
@@ -0,0 +1,107 @@
+import os
+import subprocess
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from coala_utils.ContextManagers import subprocess_timeout
+from coala_utils.MutableValue import MutableValue
+
+
+# The outcome of a process started by ``run_processes``. ``usage`` is the
+# ``ProcessUsage`` recorded by ``subprocess_timeout``.
+ProcessResult = namedtuple('ProcessResult',
+                           'command, returncode, stdout, stderr, timedout, '
+                           'usage')
+
+
+def _run_process(command, timeout, kill_pg, grace_periods, popen_kwargs):
+    usage = MutableValue()
+    with subprocess.Popen(command,
+                          stdin=subprocess.DEVNULL,
+                          stdout=subprocess.PIPE,
+                          stderr=subprocess.PIPE,
+                          **popen_kwargs) as process:
+        with subprocess_timeout(process, timeout, kill_pg, grace_periods,
+                                usage) as timedout:
+            # ``communicate()`` reads both pipes concurrently, so a process
+            # filling one of them while we wait for the other can't block.
+            stdout, stderr = process.communicate()
+
+    return ProcessResult(command, process.returncode, stdout, stderr,
+                         timedout.value, usage.value)
+
+
+def run_processes(commands, max_parallel=None, timeout=0, kill_pg=False,
+                  grace_periods=(5, 5), **popen_kwargs):
+    """
+    Runs processes concurrently, with at most ``max_parallel`` of them
+    running at the same time.
+
+    >>> import sys
+    >>> results = run_processes([[sys.executable, '-c', 'print(1)'],
+    ...                          [sys.executable, '-c', 'exit(2)']],
+    ...                         max_parallel=2,
+    ...                         universal_newlines=True)
+    >>> [(result.returncode, result.stdout) for result in results]
+    [(0, '1\\n'), (2, '')]
+
+    :param commands:      An iterable of commands as accepted by
+                          ``subprocess.Popen``.
+    :param max_parallel:  The maximum number of processes running at the same
+                          time. Defaults to the number of CPUs.
+    :param timeout:       The number of seconds each process may run for before
+                          it's killed by ``subprocess_timeout``. If set to 0 or
+                          a negative value, the processes may run
+                          indefinitely.
+    :param kill_pg:       Whether to start each process in a new session and
+                          kill its whole process group on timeout. Pass True
+                          if the commands start child processes, which would
+                          otherwise keep the output pipes open after a
+                          timeout.
+    :param grace_periods: The grace periods between the signals sent on
+                          timeout, see ``subprocess_timeout``.
+    :param popen_kwargs:  Additional keyword arguments passed to
+                          ``subprocess.Popen``, e.g. ``cwd`` or
+                          ``universal_newlines``.
+    :raises OSError:      Raised if a process can't be started. No more
+                          processes are started then, the running ones are
+                          waited for.
+    :return:              A list of ``ProcessResult`` objects in the order of
+                          the commands.
+    """
+    if max_parallel is None:
+        max_parallel = os.cpu_count() or 1
+
+    if kill_pg:
+        # Otherwise the processes would share our process group.
+        popen_kwargs['start_new_session'] = True
+
+    futures = []
+    failed = threading.Event()
+
+    def cancel_pending(future):
+        # Invoked by the worker before it picks up the next command.
+        if not future.cancelled() and future.exception() is not None:
+            failed.set()
+            for other in futures:
+                other.cancel()
+
+    with ThreadPoolExecutor(max_parallel) as executor:
+        for command in commands:
+            future = executor.submit(_run_process, command, timeout,
+                                     kill_pg, grace_periods, popen_kwargs)
+            future.add_done_callback(cancel_pending)
+            futures.append(future)
+            # A process may fail while the commands are still submitted.
+            if failed.is_set():
+                future.cancel()
+                break
+
+        try:
+            return [future.result() for future in futures]
+        except BaseException:
+            # E.g. KeyboardInterrupt, don't start any more processes.
+            for future in futures:
+                future.cancel()
+            raise
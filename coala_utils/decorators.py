@@ -1,10 +1,31 @@
 import inspect
-from functools import total_ordering, wraps
+import keyword
+import threading
+from collections import deque
+from functools import wraps
+from itertools import compress, count
+from operator import attrgetter, not_
+from types import FunctionType
+from weakref import WeakKeyDictionary
 
 from coala_utils.Comparable import Comparable
 
 
-def yield_once(iterator):
+def _compares_by_hash(cls):
+    """
+    Checks whether the hash of the instances of a class is consistent with
+    their equality, i.e. whether they can be deduplicated with a set.
+    Instances of classes overriding ``__eq__`` but keeping the identity based
+    ``object.__hash__`` can't.
+
+    :param cls: The class to check.
+    :return:    True if the instances can be stored in a set.
+    """
+    return cls.__hash__ is not None and (cls.__hash__ is not object.__hash__ or
+                                         cls.__eq__ is object.__eq__)
+
+
+def yield_once(iterator=None, *, key=None, window=None):
     """
     Decorator to make an iterator returned by a method yield each result only
     once.
@@ -15,18 +36,81 @@ def yield_once(iterator):
     >>> list(generate_list([1, 2, 1]))
     [1, 2]
 
+    Results are compared by the return value of ``key`` if given:
+
+    >>> @yield_once(key=str.lower)
+    ... def generate_words(foo):
+    ...     return foo
+    >>> list(generate_words(['a', 'B', 'A', 'b', 'c']))
+    ['a', 'B', 'c']
+
+    To bound the memory needed for unbounded streams, only the last
+    ``window`` yielded results are remembered. A result is yielded again
+    once ``window`` other results were yielded after it:
+
+    >>> @yield_once(window=2)
+    ... def generate_stream(foo):
+    ...     return foo
+    >>> list(generate_stream([1, 2, 1, 3, 1, 2, 2]))
+    [1, 2, 3, 1, 2]
+
+    Hashable results are remembered in a set, unhashable ones (and ones whose
+    hash isn't consistent with their equality) are compared one by one.
+
     :param iterator: Any method that returns an iterator
+    :param key:      A function retrieving the value to compare from each
+                     result.
+    :param window:   The number of yielded results to remember, None to
+                     remember all of them.
     :return:         An method returning an iterator
                      that yields every result only once at most.
     """
+    if window is not None and window < 1:
+        raise ValueError('window must be positive.')
+
+    if iterator is None:
+        return lambda iterator: yield_once(iterator, key=key, window=window)
+
     @wraps(iterator)
     def yield_once_generator(*args, **kwargs):
-        # a list is used to avoid an unhashable type TypeError
-        yielded = []
+        yielded = set()
+        # A list is used for unhashable values to avoid a TypeError.
+        unhashable_yielded = []
+        recent = None if window is None else deque()
+        compares_by_hash = {}
+
         for item in iterator(*args, **kwargs):
-            if item not in yielded:
-                yielded.append(item)
-                yield item
+            value = item if key is None else key(item)
+
+            cls = type(value)
+            hashable = compares_by_hash.get(cls)
+            if hashable is None:
+                hashable = compares_by_hash[cls] = _compares_by_hash(cls)
+
+            if hashable:
+                try:
+                    if value in yielded:
+                        continue
+                    yielded.add(value)
+                except TypeError:
+                    # E.g. tuples containing lists.
+                    hashable = False
+
+            if not hashable:
+                if value in unhashable_yielded:
+                    continue
+                unhashable_yielded.append(value)
+
+            if recent is not None:
+                recent.append((value, hashable))
+                if len(recent) > window:
+                    value, hashable = recent.popleft()
+                    if hashable:
+                        yielded.remove(value)
+                    else:
+                        unhashable_yielded.remove(value)
+
+            yield item
 
     return yield_once_generator
 
@@ -61,29 +145,126 @@ def _to_list(var):
             return [var]
 
 
+_MISSING = object()
+
+# The names the wrappers generated by ``arguments_to_lists`` use
+# internally. Functions with parameters of these names get a generic wrapper.
+_TO_LIST_NAMESPACE_NAMES = ('_function', '_list', '_missing', '_to_list')
+
+
+def _to_list_expression(name):
+    # Lists are passed through without calling ``_to_list``.
+    return '{0} if {0}.__class__ is _list else _to_list({0})'.format(name)
+
+
+def _compile_arguments_to_lists(function):
+    """
+    Compiles a wrapper for ``arguments_to_lists`` matching the signature of
+    the given function, so each parameter is converted without looping over
+    the arguments on every call.
+
+    :param function: The function to wrap.
+    :return:         The wrapper or None if the signature is not supported.
+    """
+    try:
+        parameters = inspect.signature(function).parameters.values()
+    except (TypeError, ValueError):
+        return None
+
+    namespace = {'_function': function,
+                 '_list': list,
+                 '_missing': _MISSING,
+                 '_to_list': _to_list}
+    arguments = []
+    positional = []
+    keywords = []
+    needs_marker = True
+    for i, parameter in enumerate(parameters):
+        name = parameter.name
+        if (parameter.kind is parameter.POSITIONAL_ONLY or
+                name in _TO_LIST_NAMESPACE_NAMES or
+                name.startswith('_default')):
+            return None
+
+        if parameter.kind is parameter.VAR_POSITIONAL:
+            needs_marker = False
+            arguments.append('*' + name)
+            positional.append('*[_to_list(value) for value in {}]'.format(
+                name))
+            continue
+        if parameter.kind is parameter.VAR_KEYWORD:
+            arguments.append('**' + name)
+            keywords.append(
+                '**{{key: _to_list(value) for key, value in {}.items()}}'
+                .format(name))
+            continue
+
+        expression = _to_list_expression(name)
+        if parameter.default is parameter.empty:
+            argument = name
+        else:
+            # Omitted arguments are passed on unconverted, just like the
+            # function would get its default value otherwise.
+            default = '_default' + str(i)
+            namespace[default] = parameter.default
+            argument = name + '=_missing'
+            expression = '{} if {} is _missing else ({})'.format(
+                default, name, expression)
+
+        if parameter.kind is parameter.KEYWORD_ONLY:
+            if needs_marker:
+                needs_marker = False
+                arguments.append('*')
+            keywords.append(name + '=' + expression)
+        else:
+            positional.append(expression)
+        arguments.append(argument)
+
+    return _create_function(
+        'l_function',
+        arguments,
+        ['return _function({})'.format(', '.join(positional + keywords))],
+        namespace)
+
+
 def arguments_to_lists(function):
     """
     Decorator for a function that converts all arguments to lists.
 
+    >>> @arguments_to_lists
+    ... def concatenate(first, second=None, *others):
+    ...     return first + (second or []) + sum(others, [])
+    >>> concatenate('a', ('b', 'c'), None, [1])
+    ['a', 'b', 'c', 1]
+    >>> concatenate(None)
+    []
+
+    The wrapper is compiled from the signature of the function, so each
+    argument only costs a type check if it already is a list. Lists are passed
+    on as they are, without being copied.
+
     :param function: target function
     :return:         target function with only lists as parameters
     """
-    @wraps(function)
-    def l_function(*args, **kwargs):
-        l_args = [_to_list(arg) for arg in args]
-        l_kwargs = {}
+    l_function = _compile_arguments_to_lists(function)
+    if l_function is None:
+        def l_function(*args, **kwargs):
+            l_args = [_to_list(arg) for arg in args]
+            l_kwargs = {}
 
-        for key, value in kwargs.items():
-            l_kwargs[key] = _to_list(value)
-        return function(*l_args, **l_kwargs)
+            for key, value in kwargs.items():
+                l_kwargs[key] = _to_list(value)
+            return function(*l_args, **l_kwargs)
 
-    return l_function
+    return wraps(function)(l_function)
 
 
 def _get_member(obj, member):
     # If not found, pass AttributeError to invoking function.
-    attribute = getattr(obj, member)
+    return _member_value(getattr(obj, member), member)
 
+
+def _member_value(attribute, member):
     if callable(attribute) and hasattr(attribute, "__self__"):
         # If the value is a bound method, invoke it like a getter and return
         # its value.
@@ -102,6 +283,40 @@ def _get_member(obj, member):
         return attribute
 
 
+def _compile_repr(cls, members):
+    """
+    Compiles a ``__repr__()`` function for the given class producing the same
+    string as ``_construct_repr_string()`` with a single ``format()`` call.
+
+    Like ``_get_member()``, bound methods are invoked like getters, which is
+    decided on every call as instances can hold them too.
+
+    :param cls:     The class of the instances to represent.
+    :param members: A list of (member-name, repr-function) tuples.
+    :return:        The ``__repr__()`` function.
+    """
+    namespace = {'_member_value': _member_value}
+    template = ("<" + cls.__name__ + " object(" +
+                ", ".join(member.replace("{", "{{").replace("}", "}}") +
+                          "={}" for member, func in members) +
+                ") at {}>")
+    namespace['template'] = template
+
+    values = []
+    for i, (member, func) in enumerate(members):
+        value = '_member_value({}, {!r})'.format(_attribute('self', member),
+                                                 member)
+        namespace['repr' + str(i)] = func
+        values.append('repr{}({}), '.format(i, value))
+
+    return _create_function(
+        '__repr__',
+        ['self'],
+        ['return template.format({}hex(id(self)))'.format(''.join(values))],
+        namespace,
+        cls)
+
+
 def _construct_repr_string(obj, members):
     # The passed entries have format (member-name, repr-function).
     values = ", ".join(member + "=" + func(_get_member(obj, member))
@@ -110,7 +325,95 @@ def _construct_repr_string(obj, members):
             + hex(id(obj)) + ">")
 
 
-def get_public_members(obj):
+def _attribute(obj, member):
+    """
+    Returns the source code expression accessing the given member of an
+    object.
+
+    >>> _attribute('self', 'position')
+    'self.position'
+    >>> _attribute('self', 'class')
+    "getattr(self, 'class')"
+    """
+    if member.isidentifier() and not keyword.iskeyword(member):
+        return obj + '.' + member
+    else:
+        return 'getattr({}, {!r})'.format(obj, member)
+
+
+def _create_function(name, arguments, body, namespace, cls=None):
+    """
+    Compiles a function from source code, like the ``dataclasses`` module does
+    for the methods it generates. This avoids looping over the members and
+    calling ``getattr()`` for each of them on every invocation.
+
+    :param name:      The name of the function.
+    :param arguments: A list of argument names.
+    :param body:      A list of source code lines forming the function body.
+    :param namespace: The global names available to the function.
+    :param cls:       The class the function is created for, used to set its
+                      qualified name.
+    :return:          The compiled function.
+    """
+    source = 'def {}({}):\n{}'.format(
+        name,
+        ', '.join(arguments),
+        '\n'.join('    ' + line for chunk in body
+                  for line in chunk.split('\n')))
+    local_namespace = {}
+    exec(source, dict(namespace), local_namespace)
+
+    function = local_namespace[name]
+    if cls is not None:
+        function.__qualname__ = cls.__qualname__ + '.' + name
+    return function
+
+
+_public_class_members_cache = WeakKeyDictionary()
+
+
+def _public_class_members(cls):
+    """
+    Retrieves the public names of a class that can refer to member-like
+    values of its instances, i.e. all public names except the ones of plain
+    methods, classmethods and staticmethods. The result is cached per class.
+
+    :param cls: The class to probe.
+    :return:    A tuple of a set of all these names and a set of the names
+                referring to properties.
+    """
+    try:
+        return _public_class_members_cache[cls]
+    except KeyError:
+        pass
+
+    members = set()
+    properties = set()
+    # Like ``dir()`` of an instance, only the classes of the MRO are looked
+    # at, not ``__dir__()`` or attributes of the metaclass.
+    seen = set()
+    for base in cls.__mro__:
+        for name, attribute in vars(base).items():
+            if name in seen or name.startswith('_'):
+                continue
+            seen.add(name)
+
+            if isinstance(attribute, (FunctionType, classmethod)):
+                continue
+            if (isinstance(attribute, staticmethod) and
+                    callable(attribute.__func__)):
+                continue
+
+            members.add(name)
+            if isinstance(attribute, property):
+                properties.add(name)
+
+    result = _public_class_members_cache[cls] = (frozenset(members),
+                                                 frozenset(properties))
+    return result
+
+
+def get_public_members(obj, include_properties=True):
     """
     Retrieves a dict of member-like objects (members or properties) that are
     publically exposed.
@@ -127,13 +430,46 @@ def get_public_members(obj):
     >>> dict['color'] == 'green'
     True
 
+    Each attribute is evaluated only once, so property getters are invoked
+    once per call. The candidate names of the class are cached, so
+    attributes added to the class itself afterwards are not picked up
+    (attributes of the instance are).
 
-    :param obj: The object to probe.
-    :return:    A dict of strings, {member : value}.
+    :param obj:                The object to probe.
+    :param include_properties: Whether to include the values of properties.
+    :return:                   A dict of strings, {member : value}.
     """
-    return {attr: getattr(obj, attr) for attr in dir(obj)
-            if not attr.startswith("_")
-            and not hasattr(getattr(obj, attr), '__call__')}
+    cls = type(obj)
+    if isinstance(obj, type) or cls.__dir__ is not object.__dir__:
+        # Types, modules and classes customizing ``dir()`` don't list their
+        # members the way ``_public_class_members`` assumes.
+        names = (name for name in dir(obj) if not name.startswith('_'))
+        if not include_properties:
+            names = (name for name in names
+                     if not isinstance(inspect.getattr_static(obj, name, None),
+                                       property))
+    else:
+        names, properties = _public_class_members(cls)
+        if not include_properties:
+            names = names - properties
+
+        instance_dict = getattr(obj, '__dict__', None)
+        if instance_dict:
+            names = names.union(name for name in instance_dict
+                                if not name.startswith('_'))
+            if not include_properties:
+                # Properties take precedence over the instance dict.
+                names -= properties
+
+        names = sorted(names)
+
+    result = {}
+    for name in names:
+        value = getattr(obj, name)
+        if not callable(value):
+            result[name] = value
+
+    return result
 
 
 def generate_repr(*members):
@@ -241,8 +577,18 @@ def generate_repr(*members):
             else:
                 members_to_print[i] = (member, repr)
 
+        # The functions are compiled on first use as members may be added to
+        # the class later on. Subclasses get their own functions since they
+        # may define members differently.
+        repr_functions = {}
+
         def __repr__(self):
-            return _construct_repr_string(self, members_to_print)
+            function = repr_functions.get(type(self))
+            if function is None:
+                function = repr_functions[type(self)] = _compile_repr(
+                    type(self), members_to_print)
+
+            return function(self)
     else:
         def __repr__(self):
             # Need to fetch member variables every time since they are unknown
@@ -257,7 +603,44 @@ def generate_repr(*members):
     return decorator
 
 
-def generate_eq(*members):
+def generate_hash(*members):
+    """
+    Decorator that generates a ``__hash__()`` function for the decorated class
+    based on the given members, consistent with the equality generated by
+    ``generate_eq`` for the same members:
+
+    >>> @generate_hash('length', 'color')
+    ... @generate_eq('length', 'color')
+    ... class Reptile:
+    ...     def __init__(self, length, color):
+    ...         self.length = length
+    ...         self.color = color
+    >>> len({Reptile('3.4', 'green'), Reptile('3.4', 'green')})
+    1
+
+    The hash is computed from the current values of the members on every
+    call, so it follows changes of them. Instances must not be changed while
+    they're stored in a set or used as a dict key though.
+
+    Note that this decorator modifies the given class in place!
+
+    :param members: A list of members to compute the hash from. Their values
+                    need to be hashable.
+    """
+    def decorator(cls):
+        cls.__hash__ = _create_function(
+            '__hash__',
+            ['self'],
+            ['return hash(({}))'.format(''.join(
+                _attribute('self', member) + ', ' for member in members))],
+            {},
+            cls)
+        return cls
+
+    return decorator
+
+
+def generate_eq(*members, hashable=False):
     """
     Decorator that generates equality and inequality operators for the
     decorated class. The given members as well as the type of self and other
@@ -287,31 +670,67 @@ def generate_eq(*members):
     >>> issubclass(Reptile, Comparable)
     True
 
+    As ``__eq__`` is overridden, the default hash of the objects doesn't fit
+    the equality anymore. Pass ``hashable=True`` to generate a matching
+    ``__hash__`` with ``generate_hash``.
+
     Note that this decorator modifies the given class in place!
 
-    :param members: A list of members to compare for equality.
+    :param members:  A list of members to compare for equality.
+    :param hashable: Whether to generate a ``__hash__`` function based on the
+                     members too.
     """
     def decorator(cls):
-        def eq(self, other):
-            if not isinstance(other, cls):
-                return False
-
-            return all(getattr(self, member) == getattr(other, member)
-                       for member in members)
-
-        def ne(self, other):
-            return not eq(self, other)
-
-        cls.__eq__ = eq
-        cls.__ne__ = ne
+        namespace = {'cls': cls}
+
+        cls.__eq__ = _create_function(
+            '__eq__',
+            ['self', 'other'],
+            ['if not isinstance(other, cls):',
+             '    return False'] +
+            ['if not {} == {}:\n'
+             '    return False'.format(_attribute('self', member),
+                                       _attribute('other', member))
+             for member in members] +
+            ['return True'],
+            namespace,
+            cls)
+        cls.__ne__ = _create_function(
+            '__ne__',
+            ['self', 'other'],
+            ['if not isinstance(other, cls):',
+             '    return True'] +
+            ['if not {} == {}:\n'
+             '    return True'.format(_attribute('self', member),
+                                      _attribute('other', member))
+             for member in members] +
+            ['return False'],
+            namespace,
+            cls)
         cls.__compare_fields__ = tuple(members)
         Comparable.register(cls)
+
+        if hashable:
+            generate_hash(*members)(cls)
+
         return cls
 
     return decorator
 
 
-def generate_ordering(*members):
+# The results of the generated ordering functions, each given as the
+# expression returned when the first differing member ``a`` of self and ``b``
+# of other is None in one of them, the expression returned when it's
+# different otherwise and the result if all members are equal. They mirror
+# the functions ``functools.total_ordering`` derives from ``__lt__``.
+_ORDERING_FUNCTIONS = {
+    '__lt__': ('a is None', 'a < b', 'False'),
+    '__le__': ('a is None', 'a < b', 'True'),
+    '__gt__': ('a is not None', 'not a < b', 'False'),
+    '__ge__': ('a is not None', 'not a < b', 'True')}
+
+
+def generate_ordering(*members, hashable=False):
     """
     Decorator that generates ordering operators for the decorated class based
     on the given member names. All ordering except equality functions will
@@ -336,6 +755,13 @@ def generate_ordering(*members):
     >>> TextPosition.__compare_fields__
     ('line', 'column')
 
+    A key function resulting in the same order is available as ``sort_key``.
+    It fetches the members only once per element when sorting, see also
+    ``fast_sorted()``.
+
+    >>> TextPosition.sort_key(start)
+    (True, 5, True, 10)
+
     The decorated classes are also subclasses of the ``Comparable`` class.
 
     >>> issubclass(TextPosition, Comparable)
@@ -343,38 +769,98 @@ def generate_ordering(*members):
 
     Note that this decorator modifies the given class in place!
 
-    :param members: A list of members to compare, ordered from high priority to
-                    low. I.e. if the first member is equal the second will be
-                    taken for comparison and so on. If a member is None it is
-                    considered smaller than any other value except None.
+    :param members:  A list of members to compare, ordered from high priority
+                     to low. I.e. if the first member is equal the second will
+                     be taken for comparison and so on. If a member is None it
+                     is considered smaller than any other value except None.
+    :param hashable: Whether to generate a ``__hash__`` function based on the
+                     members too, see ``generate_eq``.
     """
     def decorator(cls):
-        def lt(self, other):
-            if not isinstance(other, cls):
-                raise TypeError("Comparison with unrelated classes is "
-                                "unsupported.")
-
+        namespace = {'cls': cls}
+
+        for name, (none_result, result, equal_result) in (
+                _ORDERING_FUNCTIONS.items()):
+            # Like ``functools.total_ordering`` only ``__lt__`` is always
+            # overwritten, the others are kept if defined by the user.
+            existing = getattr(cls, name, None)
+            if (name != '__lt__' and
+                    existing is not getattr(object, name) and
+                    not getattr(existing, '_generated', False)):
+                continue
+
+            body = ['if not isinstance(other, cls):',
+                    '    raise TypeError("Comparison with unrelated classes '
+                    'is unsupported.")']
             for member in members:
-                if getattr(self, member) == getattr(other, member):
-                    continue
-
-                if (
-                        getattr(self, member) is None or
-                        getattr(other, member) is None):
-                    return getattr(self, member) is None
-
-                return getattr(self, member) < getattr(other, member)
-
-            return False
+                body += ['a = ' + _attribute('self', member),
+                         'b = ' + _attribute('other', member),
+                         'if not a == b:',
+                         '    if a is None or b is None:',
+                         '        return ' + none_result,
+                         '    return ' + result]
+            body.append('return ' + equal_result)
+
+            function = _create_function(name, ['self', 'other'], body,
+                                        namespace, cls)
+            function._generated = True
+            setattr(cls, name, function)
+
+        # Prefixing each member with whether it's not None sorts None first,
+        # like the comparison functions do.
+        cls.sort_key = staticmethod(_create_function(
+            'sort_key',
+            ['obj'],
+            ['v{} = {}'.format(i, _attribute('obj', member))
+             for i, member in enumerate(members)] +
+            ['return ({})'.format(''.join(
+                'v{0} is not None, v{0}, '.format(i)
+                for i in range(len(members))))],
+            namespace,
+            cls))
 
-        cls.__lt__ = lt
         cls.__compare_fields__ = tuple(members)
         Comparable.register(cls)
-        return total_ordering(generate_eq(*members)(cls))
+        return generate_eq(*members, hashable=hashable)(cls)
 
     return decorator
 
 
+def fast_sorted(iterable, reverse=False):
+    """
+    Sorts objects of a class decorated with ``generate_ordering`` using its
+    ``sort_key``. The result is the same as the one of ``sorted()``, but the
+    compared members are fetched only once per object instead of once per
+    comparison:
+
+    >>> @generate_ordering('line', 'column')
+    ... class TextPosition:
+    ...     def __init__(self, line, column):
+    ...         self.line = line
+    ...         self.column = column
+    >>> positions = fast_sorted([TextPosition(2, 1), TextPosition(None, 3),
+    ...                          TextPosition(1, 7)])
+    >>> [(position.line, position.column) for position in positions]
+    [(None, 3), (1, 7), (2, 1)]
+
+    If the objects don't share the same ``sort_key`` this falls back to
+    ``sorted()``.
+
+    :param iterable: The objects to sort.
+    :param reverse:  Whether to sort in descending order.
+    :return:         A new sorted list.
+    """
+    items = list(iterable)
+    if items:
+        key = getattr(type(items[0]), 'sort_key', None)
+        if key is not None and all(
+                getattr(item_type, 'sort_key', None) is key
+                for item_type in set(map(type, items))):
+            return sorted(items, key=key, reverse=reverse)
+
+    return sorted(items, reverse=reverse)
+
+
 class _SignatureProxy():
     def __init__(self, name):
         self.name = name
@@ -400,6 +886,56 @@ def assert_right_type(value, types, argname):
                     "{})".format(argname, types, repr(value)))
 
 
+def _type_checker(types):
+    """
+    Prepares the check of ``assert_right_type()`` for the given types once, so
+    checking a value doesn't need to inspect them again.
+
+    >>> classes, check = _type_checker((int, None))
+    >>> classes
+    (<class 'int'>,)
+    >>> check(5), check(None), check('5')
+    (True, True, False)
+
+    :param types: A type, value or ``_SignatureProxy`` or a tuple of them.
+    :return:      A tuple of the allowed classes, so the common case can be
+                  checked with a single ``isinstance()`` call, and a function
+                  returning whether a value is allowed.
+    """
+    if (isinstance(types, type) or isinstance(types, _SignatureProxy) or
+            types is None):
+        types = (types,)
+
+    classes = tuple(typ for typ in types if isinstance(typ, type))
+    names = frozenset(typ.name for typ in types
+                      if isinstance(typ, _SignatureProxy))
+    values = tuple(typ for typ in types
+                   if not isinstance(typ, _SignatureProxy))
+
+    if names:
+        return classes, lambda value: (isinstance(value, classes) or
+                                       value in values or
+                                       value.__class__.__name__ in names)
+    else:
+        return classes, lambda value: (isinstance(value, classes) or
+                                       value in values)
+
+
+_signature_enforcement = True
+
+
+def set_signature_enforcement(enabled):
+    """
+    Enables or disables the checks of all functions decorated with
+    ``enforce_signature`` (they are enabled by default). When disabled, the
+    decorated functions only pass their arguments through.
+
+    :param enabled: Whether to check the arguments.
+    """
+    global _signature_enforcement
+    _signature_enforcement = enabled
+
+
 def enforce_signature(function):
     """
     Enforces the signature of the function by throwing TypeError's if invalid
@@ -418,26 +954,34 @@ def enforce_signature(function):
 
     Any string value for any parameter e.g. would then trigger a TypeError.
 
+    The checks are prepared once when decorating. They can be switched off
+    globally with ``set_signature_enforcement()``.
+
     :param function: The function to check.
     """
     argspec = inspect.getfullargspec(function)
-    annotations = argspec.annotations
-    argnames = argspec.args
+    annotations = {argname: (annotation,) + _type_checker(annotation)
+                   for argname, annotation in argspec.annotations.items()
+                   if argname != 'return'}
 
-    unnamed_annotations = {}
-    for i, arg in enumerate(argnames):
-        if arg in annotations:
-            unnamed_annotations[i] = (annotations[arg], arg)
+    positional = tuple((i, argname) + annotations[argname]
+                       for i, argname in enumerate(argspec.args)
+                       if argname in annotations)
 
     @wraps(function)
     def decorated(*args, **kwargs):
-        for i, annotation in unnamed_annotations.items():
-            if i < len(args):
-                assert_right_type(args[i], annotation[0], annotation[1])
-
-        for argname, argval in kwargs.items():
-            if argname in annotations:
-                assert_right_type(argval, annotations[argname], argname)
+        if _signature_enforcement:
+            for i, argname, annotation, classes, check in positional:
+                if i >= len(args):
+                    break
+                if not isinstance(args[i], classes) and not check(args[i]):
+                    assert_right_type(args[i], annotation, argname)
+
+            for argname, argval in kwargs.items():
+                if argname in annotations:
+                    annotation, classes, check = annotations[argname]
+                    if not isinstance(argval, classes) and not check(argval):
+                        assert_right_type(argval, annotation, argname)
 
         return function(*args, **kwargs)
 
@@ -470,6 +1014,80 @@ class classproperty(property):
         return self.fget.__get__(None, type_)(type_)
 
 
+class cached_classproperty(classproperty):
+    """
+    Decorator to set a class function to a class property whose value is
+    computed only once per class.
+
+    >>> class Registry:
+    ...     @cached_classproperty
+    ...     def handlers(cls):
+    ...         print('Computing handlers of', cls.__name__)
+    ...         return {'name': cls.__name__}
+    >>> class SubRegistry(Registry):
+    ...     pass
+    >>> Registry.handlers
+    Computing handlers of Registry
+    {'name': 'Registry'}
+    >>> Registry().handlers
+    {'name': 'Registry'}
+
+    Subclasses get their own value:
+
+    >>> SubRegistry.handlers
+    Computing handlers of SubRegistry
+    {'name': 'SubRegistry'}
+
+    The cached values can be invalidated for a single class or for all
+    classes:
+
+    >>> vars(Registry)['handlers'].invalidate(SubRegistry)
+    >>> SubRegistry.handlers
+    Computing handlers of SubRegistry
+    {'name': 'SubRegistry'}
+    >>> vars(Registry)['handlers'].invalidate()
+    >>> Registry.handlers
+    Computing handlers of Registry
+    {'name': 'Registry'}
+
+    The value is computed while holding a lock, so concurrent first accesses
+    compute it only once.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values = WeakKeyDictionary()
+        self._lock = threading.RLock()
+
+    def __get__(self, obj, type_):
+        try:
+            return self._values[type_]
+        except KeyError:
+            pass
+
+        with self._lock:
+            try:
+                return self._values[type_]
+            except KeyError:
+                value = self._values[type_] = super().__get__(obj, type_)
+                return value
+
+    def invalidate(self, cls=None):
+        """
+        Discards the cached values, so they are computed again on the next
+        access.
+
+        :param cls: The class to discard the value of. The values of its
+                    subclasses are kept. If None, the values of all classes
+                    are discarded.
+        """
+        with self._lock:
+            if cls is None:
+                self._values.clear()
+            else:
+                self._values.pop(cls, None)
+
+
 def generate_consistency_check(*members):
     """
    Generates a ``check_consistency`` method which checks if the members given
@@ -484,12 +1102,39 @@ def generate_consistency_check(*members):
    >>> Test(a="", b="test").check_consistency()
    False
 
+   A ``check_consistency_many`` classmethod is generated as well, returning
+   the indices of the inconsistent records of a whole collection:
+
+   >>> Test.check_consistency_many([Test("x", None), Test("", None),
+   ...                              Test(None, 1)])
+   [1, 2]
+
    :param members: The members to check for consistency.
    """
+    get_members = attrgetter(*members) if members else None
+
+    def check_consistency_many(cls, records):
+        """
+        Checks the consistency of many records at once.
+
+        :param records: An iterable of records.
+        :return:        A list of the indices of the inconsistent records.
+        """
+        if get_members is None:
+            return []
+
+        # The loop runs entirely in C: ``attrgetter`` retrieves the members
+        # and ``compress`` picks the indices of the falsy results.
+        values = map(get_members, records)
+        if len(members) > 1:
+            values = map(all, values)
+        return list(compress(count(), map(not_, values)))
+
     def decorator(cls):
         cls.check_consistency = (
             lambda self: all(getattr(self, member) for member in members)
         )
+        cls.check_consistency_many = classmethod(check_consistency_many)
 
         return cls
 
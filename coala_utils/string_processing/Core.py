@@ -1,6 +1,8 @@
 import re
+from concurrent.futures import ProcessPoolExecutor
 
-from coala_utils.string_processing import InBetweenMatch
+from coala_utils.string_processing import (InBetweenMatch, Match,
+                                           NestedInBetweenMatch)
 from coala_utils.string_processing.Filters import (limit,
                                                    trim_empty_matches)
 
@@ -50,6 +52,168 @@ def unescaped_search_for(pattern,
         yield elem
 
 
+def _search_chunk(pattern, flags, chunk, offset, owned_length):
+    """
+    Searches a chunk of a larger string. This function is run inside the
+    worker processes of ``parallel_search_for()``.
+
+    :param pattern:      The regex pattern to search for.
+    :param flags:        Additional flags to pass to the regex processor.
+    :param chunk:        The chunk to search in, including the overlap into the
+                         next chunk.
+    :param offset:       The position of the chunk inside the whole string.
+    :param owned_length: Only matches starting before this position inside
+                         the chunk are returned, all others belong to the next
+                         chunk.
+    :return:             A list of ``(matched string, position)`` tuples.
+    """
+    result = []
+    for match in re.finditer(pattern, chunk, flags):
+        if match.start() >= owned_length:
+            break
+        result.append((match.group(), offset + match.start()))
+
+    return result
+
+
+def _merge_chunk_matches(regex, string, chunks, results):
+    """
+    Merges the results of ``_search_chunk()`` into the sequence of matches a
+    sequential search over the whole string would produce.
+
+    A chunk doesn't know where the matches of its predecessor ended, so its
+    first matches can overlap the last match of the previous chunk. In that
+    case the string is searched sequentially from the end of the previous
+    match until a match coincides with one of the chunk again, from where on
+    both searches are in sync.
+
+    :param regex:   The compiled regex pattern.
+    :param string:  The whole string.
+    :param chunks:  The ``(start, end)`` positions of the owned part of each
+                    chunk.
+    :param results: The result of ``_search_chunk()`` for each chunk.
+    :return:        An iterator returning ``(matched string, position)``
+                    tuples.
+    """
+    last_span = (0, 0)
+    for (chunk_start, chunk_end), matches in zip(chunks, results):
+        if matches and matches[0][1] < last_span[1]:
+            positions = {position: i
+                         for i, (text, position) in enumerate(matches)}
+            for match in regex.finditer(string, last_span[1]):
+                if match.start() >= chunk_end and chunk_end < len(string):
+                    matches = []
+                    break
+                last_span = match.span()
+                yield match.group(), match.start()
+
+                i = positions.get(match.start())
+                if i is not None and len(matches[i][0]) == len(match.group()):
+                    matches = matches[i + 1:]
+                    break
+            else:
+                matches = []
+
+        for text, position in matches:
+            last_span = (position, position + len(text))
+            yield text, position
+
+
+def parallel_search_for(pattern,
+                        string,
+                        flags=0,
+                        max_match=0,
+                        use_regex=False,
+                        workers=None,
+                        chunk_size=4 * 1024 * 1024,
+                        max_match_length=None):
+    """
+    Searches for a given pattern in a string using a pool of processes.
+
+    The string is split into chunks of ``chunk_size`` that overlap by
+    ``max_match_length - 1`` characters, so matches crossing a chunk border
+    are found as well. The chunks are searched in parallel and the results are
+    merged into the same sequence of non-overlapping matches ``search_for()``
+    would return:
+
+    >>> [match.range for match in parallel_search_for(
+    ...     "aa", "aaaaa", workers=2, chunk_size=2)]
+    [(0, 2), (2, 4)]
+
+    Strings not longer than ``chunk_size`` are searched in the current
+    process.
+
+    .. note::
+
+        The chunks are searched independently from each other, so regex
+        patterns must not depend on the text around the match (i.e. they
+        must not contain anchors like ``^`` or ``$`` or lookaround
+        assertions).
+
+    :param pattern:          A pattern that defines what to match.
+    :param string:           The string to search in. Besides strings any
+                             bytes-like object supporting slicing is accepted
+                             (e.g. ``bytes``, ``memoryview`` or ``mmap``), the
+                             pattern needs to be ``bytes`` then.
+    :param flags:            Additional flags to pass to the regex processor.
+    :param max_match:        Defines the maximum number of matches to perform.
+                             If 0 or less is provided, the number of matches
+                             is not limited.
+    :param use_regex:        Specifies whether to treat the pattern as a regex
+                             or simple string.
+    :param workers:          The number of worker processes. Defaults to the
+                             number of CPUs.
+    :param chunk_size:       The number of characters searched per chunk.
+    :param max_match_length: The maximum length a match of the pattern can
+                             have. Needed for regex patterns, simple string
+                             patterns always match their own length.
+    :raises ValueError:      Raised when ``max_match_length`` is missing for a
+                             regex pattern or when ``chunk_size`` is not
+                             positive.
+    :return:                 An iterator returning ``Match`` objects.
+    """
+    if not use_regex:
+        max_match_length = len(pattern)
+        pattern = re.escape(pattern)
+    elif max_match_length is None:
+        raise ValueError("The maximum match length must be given for regex "
+                         "patterns.")
+
+    if chunk_size <= 0:
+        raise ValueError("The chunk size must be positive.")
+
+    regex = re.compile(pattern, flags)
+    length = len(string)
+
+    if length <= chunk_size or workers == 1:
+        matches = ((match.group(), match.start())
+                   for match in regex.finditer(string))
+    else:
+        overlap = max(max_match_length - 1, 0)
+        chunks = [(start, min(start + chunk_size, length))
+                  for start in range(0, length, chunk_size)]
+
+        def chunk_arguments(start, end):
+            chunk = string[start: end + overlap]
+            if isinstance(chunk, memoryview):
+                chunk = chunk.tobytes()
+            # The last chunk also owns an empty match at the end of the
+            # string.
+            owned_length = end - start + (1 if end == length else 0)
+            return pattern, flags, chunk, start, owned_length
+
+        with ProcessPoolExecutor(workers) as executor:
+            futures = [executor.submit(_search_chunk,
+                                       *chunk_arguments(start, end))
+                       for start, end in chunks]
+            results = [future.result() for future in futures]
+
+        matches = _merge_chunk_matches(regex, string, chunks, results)
+
+    return limit((Match(text, position) for text, position in matches),
+                 max_match)
+
+
 def _split(string,
            max_split,
            remove_empty_matches,
@@ -441,26 +605,46 @@ def unescaped_strip(string):
     return unescaped_rstrip(string).lstrip()
 
 
-def _nested_search_in_between(begin, end, string):
+def _nested_search_in_between(begin,
+                              end,
+                              string,
+                              max_matches=0,
+                              remove_empty_matches=False,
+                              unescaped=False):
     """
     Searches for a string enclosed between a specified begin- and end-sequence.
-    Matches infinite times.
 
     This is a function specifically designed to be invoked from
-    ``nested_search_in_between()``.
+    ``nested_search_in_between()`` and
+    ``unescaped_nested_search_in_between()``.
 
-    :param begin:  A regex pattern that defines where to start matching.
-    :param end:    A regex pattern that defines where to end matching.
-    :param string: The string where to search in.
-    :return:       An iterator returning the matched strings.
+    :param begin:                A regex pattern that defines where to start
+                                 matching.
+    :param end:                  A regex pattern that defines where to end
+                                 matching.
+    :param string:               The string where to search in.
+    :param max_matches:          Defines the maximum number of matches. If 0 or
+                                 less is provided, the number of matches is not
+                                 limited.
+    :param remove_empty_matches: Defines whether empty entries should
+                                 be removed from the result.
+    :param unescaped:            Whether to ignore escaped begin- and
+                                 end-sequences.
+    :return:                     An iterator returning the matched strings.
     """
+    # Compilation of the begin sequence is needed to get the number of
+    # capturing groups in it.
+    end_group = re.compile(begin).groups + 2
+
     # Regex explanation:
     # 1. (begin) A capturing group that matches the begin sequence.
-    # 2. (end)   A capturing group that matches the end sequence. Because the
-    #            1st group is lazy (matches as few times as possible) the next
-    #            occurring end-sequence is matched.
+    # 2. (end)   A capturing group that matches the end sequence.
     # The '|' in the regex matches either the first or the second part.
     regex = "(" + begin + ")|(" + end + ")"
+    if unescaped:
+        # Only match sequences preceded by an even number of backslashes, see
+        # unescaped_search_in_between() for an explanation of the prefix.
+        regex = r"(?<!\\)(?:\\\\)*(?:" + regex + ")"
 
     left_match = None
     nesting_level = 0
@@ -472,21 +656,25 @@ def _nested_search_in_between(begin, end, string):
                 left_match = match
             nesting_level += 1
         else:
-            # The second group matched. This is the only alternative if group 1
-            # didn't, otherwise no match would be performed. No need to compile
-            # the begin and end sequences to get the number of capturing groups
-            # in them.
+            # The end group matched. This is the only alternative if group 1
+            # didn't, otherwise no match would be performed.
             if nesting_level > 0:
                 nesting_level -= 1
 
-            if nesting_level == 0 and left_match != None:
-                yield InBetweenMatch.from_values(
-                    left_match.group(),
-                    left_match.start(),
-                    string[left_match.end(): match.start()],
-                    left_match.end(),
-                    match.group(),
-                    match.start())
+            if nesting_level == 0 and left_match is not None:
+                inside = string[left_match.end(1): match.start(end_group)]
+                if not remove_empty_matches or inside != "":
+                    yield InBetweenMatch.from_values(
+                        left_match.group(1),
+                        left_match.start(1),
+                        inside,
+                        left_match.end(1),
+                        match.group(end_group),
+                        match.start(end_group))
+
+                    max_matches -= 1
+                    if max_matches == 0:
+                        break  # only reachable when max_matches > 0
 
                 left_match = None
 
@@ -503,8 +691,8 @@ def nested_search_in_between(begin,
     but supports nesting.
 
     Nested sequences are ignored during the match. Means you get only the first
-    nesting level returned. If you want to acquire more levels, just reinvoke
-    this function again on the return value.
+    nesting level returned. If you want to acquire more levels, use
+    ``nested_search_tree()`` which returns all of them in a single pass.
 
     Using the same begin- and end-sequence won't match anything.
 
@@ -529,9 +717,128 @@ def nested_search_in_between(begin,
         begin = re.escape(begin)
         end = re.escape(end)
 
-    strings = _nested_search_in_between(begin, end, string)
+    return _nested_search_in_between(begin,
+                                     end,
+                                     string,
+                                     max_matches,
+                                     remove_empty_matches)
 
-    if remove_empty_matches:
-        strings = filter(lambda x: str(x.inside) != "", strings)
 
-    return limit(strings, max_matches)
+def unescaped_nested_search_in_between(begin,
+                                       end,
+                                       string,
+                                       max_matches=0,
+                                       remove_empty_matches=False,
+                                       use_regex=False):
+    """
+    Searches for a string enclosed between a specified begin- and end-sequence.
+    Also enclosed \\n are put into the result. Supports nesting and handles
+    escaped begin- and end-sequences (and so only patterns that are
+    unescaped).
+
+    Escaped sequences are skipped during the same scan that tracks the nesting
+    level:
+
+    >>> [str(match.inside) for match in unescaped_nested_search_in_between(
+    ...     "(", ")", r"(a\\)(b)) (\\\\)")]
+    ['a\\\\)(b)', '\\\\\\\\']
+
+    Nested sequences are ignored during the match. Means you get only the first
+    nesting level returned.
+
+    Using the same begin- and end-sequence won't match anything.
+
+    .. warning::
+
+        Using the escape character '\\' in the begin- or end-sequences
+        the function can return strange results. The backslash can
+        interfere with the escaping regex-sequence used internally to
+        match the enclosed string.
+
+    :param begin:                A pattern that defines where to start
+                                 matching.
+    :param end:                  A pattern that defines where to end matching.
+    :param string:               The string where to search in.
+    :param max_matches:          Defines the maximum number of matches. If 0 or
+                                 less is provided, the number of matches is not
+                                 limited.
+    :param remove_empty_matches: Defines whether empty entries should
+                                 be removed from the result. An entry is
+                                 considered empty if no inner match was
+                                 performed (regardless of matched start and
+                                 end patterns).
+    :param use_regex:            Specifies whether to treat the begin and end
+                                 patterns as regexes or simple strings.
+    :return:                     An iterator returning the matched strings.
+    """
+    if not use_regex:
+        begin = re.escape(begin)
+        end = re.escape(end)
+
+    return _nested_search_in_between(begin,
+                                     end,
+                                     string,
+                                     max_matches,
+                                     remove_empty_matches,
+                                     True)
+
+
+def nested_search_tree(begin, end, string, use_regex=False):
+    """
+    Searches for strings enclosed between a specified begin- and end-sequence
+    and builds the complete nesting tree of them in a single pass over the
+    string. Doesn't handle escape sequences.
+
+    In contrast to ``nested_search_in_between()`` all nesting levels are
+    returned, so there is no need to reinvoke the search on the inside of
+    each match:
+
+    >>> roots = list(nested_search_tree("(", ")", "a(b(c)(d(e)))f()"))
+    >>> [str(root.inside) for root in roots]
+    ['b(c)(d(e))', '']
+    >>> [(str(node.inside), node.depth) for node in roots[0].walk()]
+    [('b(c)(d(e))', 0), ('c', 1), ('d(e)', 1), ('e', 2)]
+    >>> roots[0].children[1].range
+    (6, 12)
+
+    The returned roots are exactly the matches ``nested_search_in_between()``
+    yields. Unmatched end-sequences are ignored, begin-sequences that are
+    never closed are dropped together with everything nested inside them.
+
+    Using the same begin- and end-sequence won't match anything.
+
+    :param begin:     A pattern that defines where to start matching.
+    :param end:       A pattern that defines where to end matching.
+    :param string:    The string where to search in.
+    :param use_regex: Specifies whether to treat the begin and end patterns as
+                      regexes or simple strings.
+    :return:          An iterator returning ``NestedInBetweenMatch`` objects
+                      for the outermost nesting level. Deeper levels are
+                      accessible through their ``children``.
+    """
+    if not use_regex:
+        begin = re.escape(begin)
+        end = re.escape(end)
+
+    regex = "(" + begin + ")|(" + end + ")"
+
+    # Each entry holds the begin match of an open nesting level and the list
+    # of already closed children of it.
+    stack = []
+    for match in re.finditer(regex, string, re.DOTALL):
+        if match.group(1) is not None:
+            stack.append((match, []))
+        elif stack:
+            left_match, children = stack.pop()
+            node = NestedInBetweenMatch(
+                Match(left_match.group(), left_match.start()),
+                Match(string[left_match.end(): match.start()],
+                      left_match.end()),
+                Match(match.group(), match.start()),
+                len(stack),
+                children)
+
+            if stack:
+                stack[-1][1].append(node)
+            else:
+                yield node
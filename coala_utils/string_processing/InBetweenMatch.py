@@ -3,7 +3,7 @@ from coala_utils.string_processing import Match
 
 
 @generate_repr("begin", "inside", "end")
-@generate_ordering("begin", "inside", "end")
+@generate_ordering("begin", "inside", "end", hashable=True)
 class InBetweenMatch:
     """
     Holds information about a match enclosed by two matches.
@@ -0,0 +1,233 @@
+import inspect
+import sys
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter
+
+from coala_utils.decorators import generate_repr
+from coala_utils.string_processing import Core
+
+
+# The functions of ``Core`` that get instrumented. All of them return
+# iterators and take the searched string as ``string`` parameter.
+INSTRUMENTED_FUNCTIONS = ('search_for',
+                          'unescaped_search_for',
+                          'parallel_search_for',
+                          'split',
+                          'unescaped_split',
+                          'search_in_between',
+                          'unescaped_search_in_between',
+                          'nested_search_in_between',
+                          'unescaped_nested_search_in_between',
+                          'nested_search_tree')
+
+_active = None
+_lock = threading.Lock()
+
+
+@generate_repr('calls', 'bytes_scanned', 'matches', 'time')
+class CallStatistics:
+    """
+    Accumulated statistics of the calls of one function with one pattern.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.bytes_scanned = 0
+        self.matches = 0
+        self.time = 0.0
+
+
+class Instrumentation:
+    """
+    Collects the statistics of the instrumented string processing calls.
+    """
+
+    def __init__(self, callback=None):
+        """
+        :param callback: A function invoked after every finished call with the
+                         function name, the pattern, the number of scanned
+                         characters, the number of returned elements and the
+                         time spent in seconds.
+        """
+        self.callback = callback
+        self.statistics = {}
+        self._lock = threading.Lock()
+
+    def record(self, function, pattern, bytes_scanned, matches, time):
+        """
+        Records a finished call.
+
+        :param function:      The name of the called function.
+        :param pattern:       The pattern the function was called with. For
+                              the in-between functions this is a tuple of the
+                              begin and end pattern.
+        :param bytes_scanned: The length of the searched string.
+        :param matches:       The number of elements the call returned.
+        :param time:          The time spent in the call (including the
+                              iteration over its results) in seconds.
+        """
+        with self._lock:
+            entry = self.statistics.get((function, pattern))
+            if entry is None:
+                entry = self.statistics[function, pattern] = CallStatistics()
+
+            entry.calls += 1
+            entry.bytes_scanned += bytes_scanned
+            entry.matches += matches
+            entry.time += time
+
+        if self.callback is not None:
+            self.callback(function, pattern, bytes_scanned, matches, time)
+
+    def report(self, limit=None):
+        """
+        Formats the collected statistics as a table, sorted by the time spent.
+
+        :param limit: The maximum number of rows to include.
+        :return:      The report as string.
+        """
+        with self._lock:
+            rows = sorted(self.statistics.items(),
+                          key=lambda item: item[1].time,
+                          reverse=True)[:limit]
+
+        lines = ['{:<36} {:>8} {:>12} {:>10} {:>10}  {}'.format(
+            'function', 'calls', 'bytes', 'matches', 'time', 'pattern')]
+        lines.extend('{:<36} {:>8} {:>12} {:>10} {:>10.6f}  {!r}'.format(
+                         function, entry.calls, entry.bytes_scanned,
+                         entry.matches, entry.time, pattern)
+                     for (function, pattern), entry in rows)
+        return '\n'.join(lines)
+
+
+def _measure(iterator, instrumentation, function, pattern, size, time):
+    matches = 0
+    try:
+        while True:
+            start = perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                time += perf_counter() - start
+                break
+            time += perf_counter() - start
+
+            matches += 1
+            yield item
+    finally:
+        instrumentation.record(function, pattern, size, matches, time)
+
+
+def _instrument(function, instrumentation):
+    signature = inspect.signature(function)
+
+    @wraps(function)
+    def instrumented(*args, **kwargs):
+        arguments = signature.bind(*args, **kwargs).arguments
+        if 'pattern' in arguments:
+            pattern = arguments['pattern']
+        else:
+            pattern = (arguments['begin'], arguments['end'])
+
+        start = perf_counter()
+        iterator = iter(function(*args, **kwargs))
+        return _measure(iterator,
+                        instrumentation,
+                        function.__name__,
+                        pattern,
+                        len(arguments['string']),
+                        perf_counter() - start)
+
+    return instrumented
+
+
+def _replace_everywhere(replacements):
+    # Functions imported via ``from ... import`` are bound in the importing
+    # module too, so they are replaced in all loaded modules.
+    for module in list(sys.modules.values()):
+        # ``sys.modules`` may hold entries which aren't modules, e.g. None.
+        namespace = getattr(module, '__dict__', {})
+        for name, value in list(namespace.items()):
+            replacement = replacements.get(id(value))
+            if replacement is not None and replacement[0] is value:
+                namespace[name] = replacement[1]
+
+
+def enable_instrumentation(callback=None):
+    """
+    Instruments the string processing functions.
+
+    The functions are replaced with instrumented versions in all loaded
+    modules, including the ones which imported them by name. When
+    instrumentation is disabled (the default) the original functions are
+    used, so there is no overhead at all.
+
+    Calls made internally are recorded as well, e.g. ``split()`` is recorded
+    together with the ``search_for()`` call it uses to find the separators.
+
+    :param callback: A function invoked after every finished call, see
+                     ``Instrumentation``.
+    :return:         The ``Instrumentation`` collecting the statistics.
+    """
+    global _active
+
+    with _lock:
+        if _active is not None:
+            _disable()
+
+        instrumentation = Instrumentation(callback)
+        replacements = {}
+        for name in INSTRUMENTED_FUNCTIONS:
+            function = getattr(Core, name)
+            replacements[id(function)] = (
+                function, _instrument(function, instrumentation))
+
+        _replace_everywhere(replacements)
+        _active = instrumentation, replacements
+        return instrumentation
+
+
+def _disable():
+    global _active
+
+    replacements = _active[1]
+    _replace_everywhere({id(instrumented): (instrumented, function)
+                         for function, instrumented in replacements.values()})
+    _active = None
+
+
+def disable_instrumentation():
+    """
+    Restores the original, uninstrumented string processing functions.
+    """
+    with _lock:
+        if _active is not None:
+            _disable()
+
+
+@contextmanager
+def instrument(callback=None):
+    """
+    Instruments the string processing functions while the context is active.
+
+    >>> from coala_utils import string_processing
+    >>> with instrument() as instrumentation:
+    ...     parts = list(string_processing.split(",", "a,b,c"))
+    >>> instrumentation.statistics["split", ","]
+    <CallStatistics object(calls=1, bytes_scanned=5, matches=3, time=...) ...>
+    >>> print(instrumentation.report())
+    function                                calls        bytes    matches ...
+    split                                       1            5          3 ...
+    search_for                                  1            5          2 ...
+
+    :param callback: A function invoked after every finished call, see
+                     ``Instrumentation``.
+    :return:         A context manager yielding the ``Instrumentation``.
+    """
+    instrumentation = enable_instrumentation(callback)
+    try:
+        yield instrumentation
+    finally:
+        disable_instrumentation()
@@ -2,7 +2,7 @@ from coala_utils.decorators import generate_ordering, generate_repr
 
 
 @generate_repr("match", "range")
-@generate_ordering("range", "match")
+@generate_ordering("range", "match", hashable=True)
 class Match:
     """
     Stores information about a single textual match.
@@ -50,7 +50,7 @@ class Match:
 
         :returns: The end-position.
         """
-        return len(self) + self.position
+        return len(self._match) + self._position
 
     @property
     def range(self):
@@ -60,4 +60,4 @@ class Match:
         :returns: A pair indicating the position range. The first element is
                   the start position, the second one the end position.
         """
-        return (self.position, self.end_position)
+        return (self._position, len(self._match) + self._position)
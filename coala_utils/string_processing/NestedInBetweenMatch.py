@@ -0,0 +1,62 @@
+from coala_utils.decorators import generate_repr
+from coala_utils.string_processing import InBetweenMatch
+
+
+@generate_repr("begin", "inside", "end", "depth", ("children", len))
+class NestedInBetweenMatch(InBetweenMatch):
+    """
+    Holds information about a match enclosed by two matches together with the
+    matches nested inside of it. Only the number of children is shown in its
+    representation, so deep trees can be printed as well.
+    """
+
+    def __init__(self, begin, inside, end, depth=0, children=()):
+        """
+        Instantiates a new NestedInBetweenMatch.
+
+        :param begin:    The ``Match`` of the start pattern.
+        :param inside:   The ``Match`` between start and end.
+        :param end:      The ``Match`` of the end pattern.
+        :param depth:    The nesting level of this match. Matches on the
+                         outermost level have a depth of zero.
+        :param children: The ``NestedInBetweenMatch`` objects directly nested
+                         inside this match, ordered by their position.
+        """
+        InBetweenMatch.__init__(self, begin, inside, end)
+
+        self._depth = depth
+        self._children = tuple(children)
+
+    @property
+    def depth(self):
+        return self._depth
+
+    @property
+    def children(self):
+        return self._children
+
+    @property
+    def range(self):
+        """
+        Returns the position range spanned by this match, including the begin
+        and end sequences.
+
+        :returns: A pair indicating the position range. The first element is
+                  the start position of the begin sequence, the second one the
+                  end position of the end sequence.
+        """
+        return (self.begin.position, self.end.end_position)
+
+    def walk(self):
+        """
+        Iterates over this match and all matches nested inside of it in
+        pre-order (i.e. in the order their begin sequences appear in the
+        string).
+
+        :return: An iterator returning ``NestedInBetweenMatch`` objects.
+        """
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
@@ -1,16 +1,21 @@
 # Start ignoring PyImportSortBear because of dependency chains!
 
-__all__ = ('Match', 'InBetweenMatch', 'search_for', 'unescaped_search_for',
-           'split', 'unescaped_split', 'search_in_between',
-           'unescaped_search_in_between', 'nested_search_in_between', 'escape',
-           'convert_to_raw', 'unescape', 'unescaped_rstrip', 'unescaped_strip',
-           'position_is_escaped', 'join_names')
+__all__ = ('Match', 'InBetweenMatch', 'NestedInBetweenMatch', 'search_for',
+           'unescaped_search_for', 'parallel_search_for', 'split',
+           'unescaped_split', 'search_in_between',
+           'unescaped_search_in_between', 'nested_search_in_between',
+           'unescaped_nested_search_in_between', 'nested_search_tree',
+           'escape', 'convert_to_raw', 'unescape', 'unescaped_rstrip',
+           'unescaped_strip', 'position_is_escaped', 'join_names')
 
 from coala_utils.string_processing.Match import Match
 from coala_utils.string_processing.InBetweenMatch import InBetweenMatch
+from coala_utils.string_processing.NestedInBetweenMatch import (
+    NestedInBetweenMatch)
 from coala_utils.string_processing.Core import (
-    search_for, unescaped_search_for, split, unescaped_split,
-    search_in_between, unescaped_search_in_between, nested_search_in_between,
-    escape, convert_to_raw, unescape, unescaped_rstrip, unescaped_strip,
-    position_is_escaped, join_names)
+    search_for, unescaped_search_for, parallel_search_for, split,
+    unescaped_split, search_in_between, unescaped_search_in_between,
+    nested_search_in_between, unescaped_nested_search_in_between,
+    nested_search_tree, escape, convert_to_raw, unescape, unescaped_rstrip,
+    unescaped_strip, position_is_escaped, join_names)
 # Stop ignoring
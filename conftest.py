@@ -0,0 +1,9 @@
+import sys
+
+
+collect_ignore = []
+
+if sys.version_info < (3, 5):  # pragma Python 3.5,3.6: no cover
+    # async/await syntax is only available since Python 3.5.
+    collect_ignore += ['coala_utils/AsyncContextManagers.py',
+                       'tests/AsyncContextManagersTest.py']
@@ -338,7 +338,8 @@ if __name__ == '__main__':
         maintainer='Adrian Zatreanu, Alexandros Dimos, Lasse Schuirmann',
         url='https://gitlab.com/coala/coala-utils',
         package_data={'coala_utils': ['VERSION']},
-        packages=find_packages(exclude=['build.*', 'tests', 'tests.*']),
+        packages=find_packages(exclude=['build.*', 'tests', 'tests.*',
+                                         'benchmarks', 'benchmarks.*']),
         install_requires=required,
         tests_require=test_required,
         long_description=long_description,
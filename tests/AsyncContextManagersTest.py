@@ -0,0 +1,123 @@
+import asyncio
+import platform
+import signal
+import subprocess
+import sys
+import unittest
+from types import SimpleNamespace
+
+from coala_utils.AsyncContextManagers import async_subprocess_timeout
+
+
+ignore_signals_code = """
+import signal, sys, time
+for name in sys.argv[1:]:
+    signal.signal(getattr(signal, name), signal.SIG_IGN)
+print('ready', flush=True)
+time.sleep(100)
+"""
+
+process_group_code = """
+import subprocess, sys, time
+subprocess.Popen([sys.executable, "-c", "import time; time.sleep(100)"])
+print('ready', flush=True)
+time.sleep(100)
+"""
+
+
+class AsyncContextManagersTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def run_process(self, code, *args, seconds=0.2, **kwargs):
+        async def run():
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, '-c', code, *args,
+                stdout=asyncio.subprocess.PIPE,
+                start_new_session=kwargs.get('kill_pg', False))
+            # Wait until the signal handlers are installed.
+            await process.stdout.readline()
+            async with async_subprocess_timeout(process, seconds,
+                                                **kwargs) as timedout:
+                returncode = await process.wait()
+            return timedout.value, returncode
+
+        return self.loop.run_until_complete(run())
+
+    def test_no_timeout(self):
+        code = 'print("ready")'
+        self.assertEqual(self.run_process(code), (False, 0))
+        self.assertEqual(self.run_process(code, seconds=0), (False, 0))
+
+    @unittest.skipIf(platform.system() == 'Windows', 'POSIX signals only')
+    def test_escalation(self):
+        timedout, returncode = self.run_process(ignore_signals_code)
+        self.assertTrue(timedout)
+        self.assertNotEqual(returncode, 0)
+        self.assertEqual(
+            self.run_process(ignore_signals_code, 'SIGINT',
+                             grace_periods=(0.1, 0.1)),
+            (True, -signal.SIGTERM))
+        self.assertEqual(
+            self.run_process(ignore_signals_code, 'SIGINT', 'SIGTERM',
+                             grace_periods=(0.1, 0.1)),
+            (True, -signal.SIGKILL))
+
+    @unittest.skipIf(platform.system() == 'Windows', 'POSIX signals only')
+    def test_no_escalation(self):
+        async def run():
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, '-c', ignore_signals_code, 'SIGINT',
+                stdout=asyncio.subprocess.PIPE)
+            await process.stdout.readline()
+            async with async_subprocess_timeout(process, 0.1,
+                                                grace_periods=()) as timedout:
+                await asyncio.sleep(0.5)
+                self.assertTrue(timedout.value)
+                self.assertIsNone(process.returncode)
+            process.kill()
+            await process.wait()
+
+        self.loop.run_until_complete(run())
+
+    @unittest.skipIf(platform.system() == 'Windows', 'POSIX signals only')
+    def test_process_group(self):
+        timedout, returncode = self.run_process(process_group_code,
+                                                kill_pg=True)
+        self.assertTrue(timedout)
+        self.assertNotEqual(returncode, 0)
+
+    def test_exited(self):
+        async def run():
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, '-c', '')
+            async with async_subprocess_timeout(process, 0.1) as timedout:
+                await process.wait()
+                await asyncio.sleep(0.3)
+            return timedout.value
+
+        self.assertFalse(self.loop.run_until_complete(run()))
+
+    @unittest.skipIf(platform.system() == 'Windows', 'POSIX signals only')
+    def test_reaped_process_group(self):
+        errors = []
+        self.loop.set_exception_handler(
+            lambda loop, context: errors.append(context))
+
+        # A process that was reaped while its return code isn't set yet.
+        reaped = subprocess.Popen([sys.executable, '-c', ''])
+        reaped.wait()
+        process = SimpleNamespace(pid=reaped.pid, returncode=None)
+
+        async def run():
+            async with async_subprocess_timeout(process, 0.05,
+                                                kill_pg=True) as timedout:
+                await asyncio.sleep(0.2)
+            return timedout.value
+
+        self.assertTrue(self.loop.run_until_complete(run()))
+        self.assertEqual(errors, [])
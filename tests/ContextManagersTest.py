@@ -1,14 +1,23 @@
 import os
 import platform
+import signal
 import subprocess
 import sys
+import threading
+import time
+from contextlib import ExitStack, closing
+from io import StringIO
+from pathlib import Path
 from tempfile import TemporaryDirectory
 import unittest
 
 from coala_utils.ContextManagers import (
-    change_directory, make_temp, prepare_file, retrieve_stdout,
-    retrieve_stderr, simulate_console_inputs, subprocess_timeout,
-    suppress_stdout, open_files)
+    _Watchdog, CapturedOutput, change_directory, change_local_directory,
+    get_local_directory, make_temp, open_local, prepare_file, prepare_files,
+    replace_stderr, replace_stdout, resolve_local_path, retrieve_fd_output,
+    retrieve_stdout, retrieve_stderr, simulate_console_inputs,
+    subprocess_timeout, suppress_stdout, open_files)
+from coala_utils.MutableValue import MutableValue
 
 
 def create_process_group(command_array, **kwargs):
@@ -32,6 +41,62 @@ p = subprocess.Popen([sys.executable,
 time.sleep(100);
 """
 
+ignore_signals_test_code = """
+import signal, sys, time
+for name in sys.argv[1:]:
+    signal.signal(getattr(signal, name), signal.SIG_IGN)
+print("ready", flush=True)
+time.sleep(100)
+"""
+
+
+class WatchdogTest(unittest.TestCase):
+
+    def test_raising_callback(self):
+        watchdog = _Watchdog()
+        fired = threading.Event()
+
+        def callback():
+            raise OSError("callback failed")
+
+        stderr = StringIO()
+        with replace_stderr(stderr):
+            watchdog.schedule(0, callback)
+            thread = watchdog._thread
+            watchdog.schedule(0.05, fired.set)
+            self.assertTrue(fired.wait(5))
+            # Schedule again after the thread exited.
+            thread.join()
+            self.assertIsNone(watchdog._thread)
+            fired.clear()
+            watchdog.schedule(0, fired.set)
+            self.assertTrue(fired.wait(5))
+
+        self.assertIn("OSError: callback failed", stderr.getvalue())
+
+    def test_cancel_many(self):
+        watchdog = _Watchdog()
+        entries = [watchdog.schedule(60, self.fail) for _ in range(100)]
+        thread = watchdog._thread
+        # The thread drops cancelled entries reaching the top of the heap, so
+        # the last ones are cancelled first.
+        for entry in reversed(entries[35:]):
+            watchdog.cancel(entry)
+        # The cancelled entries are dropped once they make up most of the
+        # heap.
+        self.assertEqual(len(watchdog._deadlines), 35)
+        watchdog.cancel(entries[-1])
+        self.assertEqual(watchdog._cancelled, 0)
+
+        for entry in entries[:35]:
+            watchdog.cancel(entry)
+        fired = threading.Event()
+        watchdog.schedule(0, fired.set)
+        self.assertTrue(fired.wait(5))
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(watchdog._deadlines, [])
+
 
 class ContextManagersTest(unittest.TestCase):
 
@@ -70,6 +135,124 @@ class ContextManagersTest(unittest.TestCase):
             self.assertEqual(timedout.value, False)
         self.assertEqual(retval, 0)
 
+    def test_subprocess_timeout_reaped(self):
+        p = subprocess.Popen([sys.executable, "-c", ""])
+        p.wait()
+        for kill_pg in (False, True):
+            with subprocess_timeout(p, 0.05, kill_pg=kill_pg) as timedout:
+                time.sleep(0.2)
+            self.assertEqual(timedout.value, True)
+
+    @unittest.skipIf(platform.system() == "Windows", "POSIX signals only")
+    def test_subprocess_timeout_escalation(self):
+        def run(*ignored_signals, **kwargs):
+            p = subprocess.Popen([sys.executable,
+                                  "-c",
+                                  ignore_signals_test_code] +
+                                 list(ignored_signals),
+                                 stdout=subprocess.PIPE)
+            # Wait until the signal handlers are installed.
+            p.stdout.readline()
+            with subprocess_timeout(p, 0.1, **kwargs) as timedout:
+                retval = p.wait()
+            p.stdout.close()
+            self.assertEqual(timedout.value, True)
+            return retval
+
+        self.assertEqual(run("SIGINT", grace_periods=(0.1, 0.1)),
+                         -signal.SIGTERM)
+        self.assertEqual(run("SIGINT", "SIGTERM", grace_periods=(0.1, 0.1)),
+                         -signal.SIGKILL)
+
+        p = subprocess.Popen([sys.executable,
+                              "-c",
+                              ignore_signals_test_code,
+                              "SIGINT"],
+                             stdout=subprocess.PIPE)
+        p.stdout.readline()
+        with subprocess_timeout(p, 0.1, grace_periods=()):
+            time.sleep(0.5)
+            self.assertIsNone(p.poll())
+        p.kill()
+        p.wait()
+        p.stdout.close()
+
+        # The process exits on SIGINT and is reaped during the grace period,
+        # so no further signal is sent to its (possibly reused) pid.
+        p = subprocess.Popen([sys.executable,
+                              "-c",
+                              ignore_signals_test_code],
+                             stdout=subprocess.PIPE)
+        p.stdout.readline()
+        with subprocess_timeout(p, 0.1, grace_periods=(0.1,)) as timedout:
+            retval = p.wait()
+            time.sleep(0.3)
+        p.stdout.close()
+        self.assertTrue(timedout.value)
+        self.assertEqual(p.returncode, retval)
+
+    def test_subprocess_timeout_usage(self):
+        usage = MutableValue()
+        p = subprocess.Popen([sys.executable,
+                              "-c",
+                              "x = bytearray(50 * 1024 * 1024)"])
+        with subprocess_timeout(p, 10, usage=usage):
+            p.wait()
+        self.assertGreater(usage.value.wall_time, 0)
+        if platform.system() != "Windows":  # pragma: no cover
+            self.assertGreater(usage.value.user_time +
+                               usage.value.system_time, 0)
+            self.assertGreater(usage.value.max_rss, 50 * 1024 * 1024)
+        self.assertNotIn("_try_wait", vars(p))
+
+        # Waiting with a timeout polls the process before reaping it.
+        p = subprocess.Popen([sys.executable,
+                              "-c",
+                              "import time; time.sleep(0.2)"])
+        with subprocess_timeout(p, 10, usage=usage):
+            with self.assertRaises(subprocess.TimeoutExpired):
+                p.wait(0.01)
+            p.wait()
+        self.assertGreater(usage.value.wall_time, 0.1)
+
+        if platform.system() != "Windows":  # pragma: no cover
+            # The process is reaped by someone else.
+            p = subprocess.Popen([sys.executable, "-c", ""])
+            with subprocess_timeout(p, 10, usage=usage):
+                os.waitpid(p.pid, 0)
+                self.assertEqual(p.wait(), 0)
+            self.assertEqual(usage.value[1:], (None, None, None))
+
+        p = subprocess.Popen([sys.executable, "-c", ""])
+        with subprocess_timeout(p, 0, usage=usage):
+            while p.poll() is None:
+                time.sleep(0.01)
+        self.assertGreater(usage.value.wall_time, 0)
+        self.assertEqual(usage.value[1:], (None, None, None))
+
+    def test_subprocess_timeout_concurrent(self):
+        processes = [subprocess.Popen([sys.executable,
+                                       "-c",
+                                       "import time; time.sleep({})".format(
+                                           5 if i % 2 else 0)])
+                     for i in range(20)]
+        threads = threading.active_count()
+        stacks = [ExitStack() for p in processes]
+        timeouts = [stack.enter_context(subprocess_timeout(p, 2))
+                    for stack, p in zip(stacks, processes)]
+        # All deadlines are handled by a single thread.
+        self.assertLessEqual(threading.active_count(), threads + 1)
+
+        # Leave the contexts of the quick processes first.
+        for i in sorted(range(20), key=lambda i: i % 2):
+            processes[i].wait()
+            stacks[i].close()
+
+        self.assertEqual([timedout.value for timedout in timeouts],
+                         [bool(i % 2) for i in range(20)])
+        self.assertEqual([p.returncode != 0 for p in processes],
+                         [bool(i % 2) for i in range(20)])
+
     def test_suppress_stdout(self):
         def print_func():
             print("func")
@@ -98,6 +281,147 @@ class ContextManagersTest(unittest.TestCase):
             print("test", file=sys.stderr)
             self.assertEqual(sio.getvalue(), "test\n")
 
+    def test_retrieve_nested(self):
+        stdout = sys.stdout
+        with retrieve_stdout() as outer:
+            print("outer")
+            with retrieve_stdout() as inner, retrieve_stderr() as err:
+                print("inner")
+                print("error", file=sys.stderr)
+                self.assertEqual(inner.getvalue(), "inner\n")
+                self.assertEqual(err.getvalue(), "error\n")
+            print("outer again")
+            self.assertEqual(outer.getvalue(), "outer\nouter again\n")
+        self.assertIs(sys.stdout, stdout)
+
+    def test_retrieve_stdout_threads(self):
+        barrier = threading.Barrier(4)
+        results = {}
+
+        def run(name):
+            with retrieve_stdout() as sio:
+                barrier.wait()
+                for i in range(100):
+                    print(name, i)
+                barrier.wait()
+                results[name] = sio.getvalue()
+
+        threads = [threading.Thread(target=run, args=(name,))
+                   for name in "abc"]
+        # Threads not retrieving their output keep writing to the original
+        # stream.
+        with closing(StringIO()) as stdout:
+            with replace_stdout(stdout):
+                for thread in threads:
+                    thread.start()
+                barrier.wait()
+                print("main")
+                barrier.wait()
+                for thread in threads:
+                    thread.join()
+                self.assertIs(sys.stdout, stdout)
+            self.assertEqual(stdout.getvalue(), "main\n")
+
+        for name in "abc":
+            self.assertEqual(results[name],
+                             "".join("{} {}\n".format(name, i)
+                                     for i in range(100)))
+
+    def test_retrieve_stdout_forwarding(self):
+        class Stream(StringIO):
+            flushed = 0
+
+            def flush(self):
+                self.flushed += 1
+
+            def isatty(self):
+                return True
+
+        results = {}
+
+        def run():
+            sys.stdout.flush()
+            results["isatty"] = sys.stdout.isatty()
+
+        with closing(Stream()) as fallback, replace_stdout(fallback):
+            with retrieve_stdout() as sio:
+                sys.stdout.flush()
+                self.assertFalse(sys.stdout.isatty())
+                self.assertEqual(sys.stdout.encoding, sio.encoding)
+
+                # Threads not retrieving their output get the attributes of
+                # the original stream.
+                thread = threading.Thread(target=run)
+                thread.start()
+                thread.join()
+            self.assertEqual((fallback.flushed, results["isatty"]), (1, True))
+
+    def test_replace_stderr(self):
+        stderr = sys.stderr
+        with closing(StringIO()) as replacement:
+            with replace_stderr(replacement):
+                self.assertIs(sys.stderr, replacement)
+                print("test", file=sys.stderr)
+            self.assertIs(sys.stderr, stderr)
+            self.assertEqual(replacement.getvalue(), "test\n")
+
+    def test_retrieve_fd_output(self):
+        with retrieve_fd_output() as output:
+            print("python", file=sys.__stdout__)
+            os.write(1, b"fd\n")
+            subprocess.check_call([sys.executable, "-c", "print('child')"])
+        self.assertEqual(output.getvalue().splitlines(),
+                         [b"python", b"fd", b"child"])
+        self.assertEqual(output.dropped, 0)
+
+        with retrieve_fd_output(2) as output:
+            os.write(2, b"error")
+        self.assertEqual(output.getvalue(), b"error")
+
+    def test_retrieve_fd_output_bounded(self):
+        chunks = []
+        with retrieve_fd_output(max_size=1000, callback=chunks.append,
+                                chunk_size=100) as output:
+            subprocess.check_call([
+                sys.executable,
+                "-c",
+                "import sys\n"
+                "for i in range(10000):\n"
+                "    sys.stdout.write('{:05}'.format(i))"])
+        data = "".join("{:05}".format(i) for i in range(10000)).encode()
+        self.assertEqual(b"".join(chunks), data)
+        self.assertEqual(output.size, len(data))
+        self.assertEqual(output.dropped, len(data) - 1000)
+        self.assertEqual(output.getvalue(), data[:500] + data[-500:])
+
+        with retrieve_fd_output(max_size=0) as output:
+            os.write(1, b"dropped")
+        self.assertEqual((output.getvalue(), output.dropped), (b"", 7))
+
+        with retrieve_fd_output(max_size=8) as output:
+            os.write(1, b"0123456")
+        self.assertEqual((output.getvalue(), output.dropped), (b"0123456", 0))
+
+    def test_captured_output(self):
+        output = CapturedOutput(8)
+        for data in (b"01", b"23", b"45"):
+            output.write(data)
+            self.assertEqual(output.dropped, 0)
+        self.assertEqual(output.getvalue(), b"012345")
+
+        output.write(b"6789")
+        self.assertEqual((output.getvalue(), output.dropped),
+                         (b"01236789", 2))
+
+    def test_retrieve_fd_output_callback_error(self):
+        def callback(data):
+            raise ValueError
+
+        with self.assertRaises(ValueError):
+            with retrieve_fd_output(callback=callback) as output:
+                os.write(1, b"data")
+        self.assertEqual(output.getvalue(), b"data")
+
     def test_simulate_console_inputs(self):
         with simulate_console_inputs(0, 1, 2) as generator:
             self.assertEqual(input(), 0)
@@ -122,6 +446,23 @@ class ContextManagersTest(unittest.TestCase):
             self.assertTrue(f_b.endswith(".orig"))
             self.assertTrue(os.path.basename(f_b).startswith("pre"))
 
+    def test_make_temp_in_memory(self):
+        with make_temp(suffix=".py", in_memory=True) as f_a:
+            self.assertTrue(f_a.endswith(".py"))
+            with open(f_a, "w") as file:
+                file.write("print('child')")
+            self.assertEqual(subprocess.check_output([sys.executable, f_a]),
+                             b"child\n")
+            with make_temp(in_memory=True) as f_b:
+                # The directory is reused.
+                self.assertEqual(os.path.dirname(f_a), os.path.dirname(f_b))
+        self.assertFalse(os.path.exists(f_a))
+        self.assertTrue(os.path.isdir(os.path.dirname(f_a)))
+
+        with TemporaryDirectory() as tempdir:
+            with make_temp(dir=tempdir, in_memory=True) as f_c:
+                self.assertEqual(os.path.dirname(f_c), tempdir)
+
     def test_prepare_file(self):
         with prepare_file(['line1', 'line2\n'],
                           "/file/name",
@@ -154,6 +495,46 @@ class ContextManagersTest(unittest.TestCase):
                           create_tempfile=False) as (lines, filename):
             self.assertEqual(filename, "dummy_file_name")
 
+        with prepare_file(['line1', 'line2\n'],
+                          None,
+                          tempfile_kwargs={"in_memory": True}) as (lines,
+                                                                   filename):
+            with open(filename) as file:
+                self.assertEqual(file.read(), "line1\nline2\n")
+        self.assertFalse(os.path.exists(filename))
+
+    def test_prepare_files(self):
+        files = {"a": ["line1", "line2\n"],
+                 "b.txt": "content",
+                 "sub/dir/c": (),
+                 "sub/d": ["", "x"],
+                 "e": "x\x0cy\x1dz"}
+        for workers in (1, 4):
+            with prepare_files(files, workers=workers) as (directory, paths):
+                self.assertEqual(set(paths), set(files))
+                contents = {}
+                for name, path in paths.items():
+                    self.assertEqual(path, os.path.join(
+                        directory, os.path.normpath(name)))
+                    with open(path) as file:
+                        contents[name] = file.read()
+                self.assertEqual(contents, {"a": "line1\nline2\n",
+                                            "b.txt": "content\n",
+                                            "sub/dir/c": "",
+                                            "sub/d": "\nx\n",
+                                            "e": "x\x0cy\x1dz\n"})
+            self.assertFalse(os.path.exists(directory))
+
+        with prepare_files(files, force_linebreaks=False,
+                           in_memory=True) as (directory, paths):
+            with open(paths["a"]) as file:
+                self.assertEqual(file.read(), "line1line2\n")
+
+        for name in ("../a", "/a", "sub/../../a"):
+            with self.assertRaises(ValueError):
+                with prepare_files({name: ""}):
+                    pass
+
     def test_change_directory(self):
         old_dir = os.getcwd()
         with TemporaryDirectory("temp") as tempdir:
@@ -162,6 +543,70 @@ class ContextManagersTest(unittest.TestCase):
                 self.assertEqual(os.getcwd(), tempdir)
         self.assertEqual(os.getcwd(), old_dir)
 
+    def test_change_local_directory(self):
+        old_dir = os.getcwd()
+        barrier = threading.Barrier(3)
+        results = {}
+
+        def run(name):
+            with change_local_directory(paths[name]) as directory:
+                self.assertEqual(get_local_directory(), directory)
+                barrier.wait()
+                with open_local("file", "w") as file:
+                    file.write(name)
+                barrier.wait()
+                with open_local("file") as file:
+                    results[name] = (file.read(),
+                                     resolve_local_path("file"))
+
+        with prepare_files({"a/x": "", "b/x": ""}) as (_, paths):
+            paths = {name: os.path.dirname(paths[name + "/x"])
+                     for name in "ab"}
+            threads = [threading.Thread(target=run, args=(name,))
+                       for name in "ab"]
+            for thread in threads:
+                thread.start()
+            barrier.wait()
+            self.assertEqual(get_local_directory(), old_dir)
+            barrier.wait()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(results, {
+                name: (name, os.path.join(paths[name], "file"))
+                for name in "ab"})
+            self.assertEqual(os.getcwd(), old_dir)
+
+            with change_local_directory(paths["a"]):
+                with open_local(os.path.join(paths["b"], "file")) as file:
+                    self.assertEqual(file.read(), "b")
+                with self.assertRaises(OSError):
+                    with change_local_directory("x"):
+                        pass
+
+    def test_open_local_path_types(self):
+        with prepare_files({"sub/file": "content"}) as (directory, paths):
+            # Path-like objects were added in Python 3.6.
+            path_types = (str, os.fsencode) + (
+                (Path,) if hasattr(os, "fspath") else ())
+            with change_local_directory(directory):
+                for path_type in path_types:
+                    with open_local(path_type("sub/file")) as file:
+                        self.assertEqual(file.read(), "content\n")
+
+                if Path in path_types:
+                    self.assertEqual(resolve_local_path(Path("sub")),
+                                     os.path.join(directory, "sub"))
+                self.assertEqual(resolve_local_path(b"sub"),
+                                 os.path.join(os.fsencode(directory), b"sub"))
+
+                with change_local_directory(b"sub") as sub:
+                    self.assertEqual(sub, os.path.join(directory, "sub"))
+
+                fd = os.open(paths["sub/file"], os.O_RDONLY)
+                with open_local(fd) as file:
+                    self.assertEqual(file.read(), "content\n")
+
     def test_open_files(self):
         current_dir = os.getcwd()
         file1 = os.path.join(current_dir, 'file1')
@@ -179,3 +624,67 @@ class ContextManagersTest(unittest.TestCase):
             self.assertEqual(f1.read(), expected)
         os.remove(file1)
         os.remove(file2)
+
+    def test_open_files_exception(self):
+        with prepare_files({"a": "a"}) as (directory, paths):
+            with self.assertRaises(FileNotFoundError):
+                with open_files((paths["a"], "r"),
+                                (os.path.join(directory, "b", "c"), "r")):
+                    pass
+
+            with self.assertRaises(RuntimeError):
+                with open_files((paths["a"], "r")) as (file,):
+                    raise RuntimeError
+            self.assertTrue(file.closed)
+
+    def test_open_files_max_open(self):
+        for max_open in (0, -1):
+            with self.assertRaises(ValueError):
+                with open_files((__file__, "r"), lazy=True,
+                                max_open=max_open):
+                    pass
+
+    def test_open_files_lazy(self):
+        names = [str(i) for i in range(10)]
+        with prepare_files({name: [name] for name in names}) as (_, paths):
+            with open_files(*[(paths[name], "r+") for name in names],
+                            lazy=True, max_open=3) as files:
+                self.assertEqual(sum(file._file is not None
+                                     for file in files), 0)
+                for file in files:
+                    self.assertEqual(file.read(1), file.name[-1])
+                for file in files:
+                    # Reopened at the previous position.
+                    self.assertEqual(file.readline(), "\n")
+                    file.write("x")
+                    self.assertLessEqual(sum(file._file is not None
+                                             for file in files), 3)
+
+                with files[0] as first:
+                    first.seek(0)
+                    self.assertEqual(list(first), ["0\n", "x"])
+                self.assertTrue(first.closed)
+
+            self.assertTrue(all(file.closed for file in files))
+            with self.assertRaises(ValueError):
+                files[1].read()
+
+            with open(paths["5"]) as file:
+                self.assertEqual(file.read(), "5\nx")
+
+            with open_files(*[(paths[name], "w") for name in names],
+                            lazy=True, max_open=1) as files:
+                for i in range(3):
+                    for file in files:
+                        file.write(str(i))
+            with open(paths["9"]) as file:
+                self.assertEqual(file.read(), "012")
+
+            with open_files(*[(paths[name], "a") for name in names],
+                            lazy=True, max_open=2) as files:
+                for file in files:
+                    file.write("a")
+                for file in files:
+                    file.write("b")
+            with open(paths["9"]) as file:
+                self.assertEqual(file.read(), "012ab")
@@ -1,9 +1,16 @@
+import functools
+import keyword
+import threading
+import time
 import unittest
+from collections import namedtuple
 
 from coala_utils.decorators import (
-    arguments_to_lists, enforce_signature, generate_eq, generate_ordering,
-    generate_repr, yield_once)
-from coala_utils.decorators import signature_type_by_name
+    arguments_to_lists, cached_classproperty, enforce_signature, fast_sorted,
+    generate_consistency_check, generate_eq, generate_hash, generate_ordering,
+    generate_repr, get_public_members, yield_once)
+from coala_utils.decorators import (
+    assert_right_type, set_signature_enforcement, signature_type_by_name)
 
 
 class YieldOnceTest(unittest.TestCase):
@@ -19,6 +26,41 @@ class YieldOnceTest(unittest.TestCase):
         self.assertEqual(list(iterate_over_list([[], [1, 2, 3], [], [1, 2]])),
                          [[], [1, 2, 3], [1, 2]])
 
+    def test_mixed(self):
+        class EqualByValue:
+            # Keeps the identity based hash, so instances can't be
+            # deduplicated with a set.
+            def __init__(self, value):
+                self.value = value
+
+            def __eq__(self, other):
+                return (isinstance(other, EqualByValue) and
+                        self.value == other.value)
+
+        EqualByValue.__hash__ = object.__hash__
+
+        first, second = EqualByValue(1), EqualByValue(1)
+        items = [1, [1], (1, [2]), 1.0, first, (1, [2]), [1], second, 'a']
+        self.assertEqual(list(yield_once(iter)(items)),
+                         [1, [1], (1, [2]), first, 'a'])
+
+    def test_key(self):
+        items = [[1, 'a'], [2, 'a'], [1, 'b'], [3, 'c']]
+        self.assertEqual(list(yield_once(key=lambda x: x[0])(iter)(items)),
+                         [[1, 'a'], [2, 'a'], [3, 'c']])
+        self.assertEqual(list(yield_once(key=lambda x: x[1:])(iter)(items)),
+                         [[1, 'a'], [1, 'b'], [3, 'c']])
+
+    def test_window(self):
+        items = [1, [1], 2, 1, 3, [1], 1, 2, 2]
+        self.assertEqual(list(yield_once(window=3)(iter)(items)),
+                         [1, [1], 2, 3, 1])
+        self.assertEqual(list(yield_once(window=1)(iter)(items)),
+                         [1, [1], 2, 1, 3, [1], 1, 2])
+
+        with self.assertRaises(ValueError):
+            yield_once(window=0)
+
 
 class ArgumentsToListsTest(unittest.TestCase):
 
@@ -34,6 +76,149 @@ class ArgumentsToListsTest(unittest.TestCase):
                                                        })
         )
 
+    def test_signature(self):
+        @arguments_to_lists
+        def return_args(a, b=None, *args, c, d=(1,), **kwargs):
+            return a, b, args, c, d, kwargs
+
+        value = [1]
+        result = return_args(value, 2, None, "", c=(3,), e=4)
+        self.assertEqual(result, ([1], [2], ([], [""]), [3], (1,), {"e": [4]}))
+        # Lists are passed on without copying.
+        self.assertIs(result[0], value)
+
+        self.assertEqual(return_args(a=None, c=None, d=None),
+                         ([], None, (), [], [], {}))
+        self.assertEqual(return_args.__name__, "return_args")
+
+        with self.assertRaises(TypeError):
+            return_args(1)
+
+    def test_keyword_only(self):
+        @arguments_to_lists
+        def return_args(a, *, b, c=None):
+            return a, b, c
+
+        self.assertEqual(return_args(1, b="b"), ([1], ["b"], None))
+        self.assertEqual(return_args(a=None, b=(2,), c=3), ([], [2], [3]))
+
+        with self.assertRaises(TypeError):
+            return_args(1, 2)
+
+    def test_uninspectable_signature(self):
+        # Builtins without signature information get the generic wrapper.
+        to_list_max = arguments_to_lists(max)
+        self.assertEqual(to_list_max(5), 5)
+        self.assertEqual(to_list_max((1, 3, 2)), 3)
+        self.assertEqual(to_list_max([1], None), [1])
+
+    def test_reserved_parameter_names(self):
+        @arguments_to_lists
+        def return_args(_function, _to_list=None):
+            return _function, _to_list
+
+        self.assertEqual(return_args(1, _to_list=2), ([1], [2]))
+        self.assertEqual(return_args(1), ([1], None))
+
+
+class GetPublicMembersTest(unittest.TestCase):
+
+    def define_class(self):
+        class X:
+            A = 1
+            _private = 2
+            static = staticmethod(len)
+            value = staticmethod(5)
+
+            def __init__(self):
+                self.calls = 0
+                self.b = 'b'
+                self.method = 3
+                self._c = 4
+
+            @property
+            def prop(self):
+                self.calls += 1
+                return self.calls
+
+            def method(self):
+                pass
+
+            @classmethod
+            def class_method(cls):
+                pass
+
+        return X
+
+    def test_members(self):
+        x = self.define_class()()
+        members = get_public_members(x)
+        self.assertEqual(members,
+                         {'A': 1, 'b': 'b', 'calls': 0, 'method': 3,
+                          'prop': 1, 'value': 5})
+        self.assertEqual(list(members), sorted(members))
+        # The property is evaluated exactly once.
+        self.assertEqual(x.calls, 1)
+
+        x.added = 5
+        self.assertEqual(get_public_members(x)['added'], 5)
+
+    def test_exclude_properties(self):
+        x = self.define_class()()
+        self.assertEqual(get_public_members(x, include_properties=False),
+                         {'A': 1, 'b': 'b', 'calls': 0, 'method': 3,
+                          'value': 5})
+        self.assertEqual(x.calls, 0)
+
+    def test_same_as_dir(self):
+        def reference(obj):
+            return {attr: getattr(obj, attr) for attr in dir(obj)
+                    if not attr.startswith('_')
+                    and not callable(getattr(obj, attr))}
+
+        X = self.define_class()
+
+        class Y(X):
+            __slots__ = ('slot',)
+            A = 'overridden'
+
+            def __init__(self):
+                X.__init__(self)
+                self.slot = 7
+
+            def __dir__(self):
+                return ['A', 'extra']
+
+            @property
+            def extra(self):
+                return 'extra'
+
+        for obj in (X, Y, Y(), keyword, 5, 'string', [1]):
+            self.assertEqual(get_public_members(obj), reference(obj))
+
+        self.assertEqual(get_public_members(Y(), include_properties=False),
+                         {'A': 'overridden'})
+        self.assertNotIn('prop', get_public_members(X, False))
+        self.assertEqual(get_public_members(keyword, False),
+                         get_public_members(keyword))
+
+    def test_metaclass(self):
+        class Meta(type):
+            def __dir__(cls):
+                return list(type.__dir__(cls)) + ['virtual']
+
+            def __getattr__(cls, name):
+                if name == 'virtual':
+                    return 'virtual'
+                raise AttributeError(name)
+
+        class Z(metaclass=Meta):
+            A = 1
+
+        self.assertEqual(get_public_members(Z), {'A': 1, 'virtual': 'virtual'})
+        # Like with dir(), instances don't see the names of the metaclass.
+        self.assertEqual(get_public_members(Z()), {'A': 1})
+
 
 class GenerateReprTest(unittest.TestCase):
     # We can't define the class in the scope of this test because generate_repr
@@ -208,6 +393,51 @@ class GenerateReprTest(unittest.TestCase):
                          "g_mem=0, getter='getter\\(\\)', one=1, Q=0\\.5, "
                          "Z=17\\) at 0x[0-9a-fA-F]+>")
 
+    def test_special_members(self):
+        X = self.define_class()
+        X.__init__ = lambda self: setattr(self, "{a}", 5)
+        X = generate_repr("{a}", ("other", str))(X)
+        X.other = classmethod(lambda cls: "{}")
+        self.assertRegex(repr(X()), r"<X object\(\{a\}=5, other=\{\}\) at "
+                                    r"0x[a-fA-F0-9]+>")
+
+    def test_subclass(self):
+        X = generate_repr("A", "getter")(self.define_class())
+
+        class Y(X):
+            A = 4
+
+            def getter(self):
+                return "method"
+
+            def __init__(self):
+                X.__init__(self)
+                del self.A
+
+        self.assertRegex(repr(X()), r"<X object\(A=2, getter='getter\(\)'\) "
+                                    r"at 0x[a-fA-F0-9]+>")
+        self.assertRegex(repr(Y()), r"<Y object\(A=4, getter='method'\) at "
+                                    r"0x[a-fA-F0-9]+>")
+
+    def test_bound_method_members(self):
+        @generate_repr("m", "getter")
+        class X:
+            def __init__(self, other):
+                self.getter = other.m
+
+            @functools.lru_cache()
+            def m(self):
+                return 7
+
+        other = X.__new__(X)
+        x = X(other)
+        self.assertRegex(repr(x), r"<X object\(m=7, getter=7\) at "
+                                  r"0x[a-fA-F0-9]+>")
+        # The second call reuses the compiled function of the class.
+        x.getter = 8
+        self.assertRegex(repr(x), r"<X object\(m=7, getter=8\) at "
+                                  r"0x[a-fA-F0-9]+>")
+
     def test_duplicate_member(self):
         X = generate_repr("A", "A")(self.define_class())
         self.assertRegex(repr(X()),
@@ -256,6 +486,63 @@ class GenerateEqTest(unittest.TestCase):
         self.assertNotEqual(Derived(), DifferentClass())
 
 
+class GenerateHashTest(unittest.TestCase):
+
+    def test_hash(self):
+        @generate_eq("cookie", "cake", hashable=True)
+        class TestClass:
+
+            def __init__(self, cookie, cake, irrelevant):
+                self.cookie = cookie
+                self.cake = cake
+                self.irrelevant = irrelevant
+
+        class Derived(TestClass):
+            pass
+
+        self.assertEqual(hash(TestClass(4, 5, 3)), hash(TestClass(4, 5, 6)))
+        self.assertEqual(hash(TestClass(4, 5, 3)), hash(Derived(4, 5, 6)))
+        self.assertEqual(
+            len({TestClass(1, 2, 3), TestClass(1, 2, 4), Derived(1, 2, 5),
+                 TestClass(2, 1, 3)}),
+            2)
+
+    def test_members_changed(self):
+        @generate_hash("value")
+        class TestClass:
+
+            def __init__(self, value):
+                self.value = value
+
+        uut = TestClass(1)
+        self.assertEqual(hash(uut), hash((1,)))
+        uut.value = 2
+        self.assertEqual(hash(uut), hash((2,)))
+        self.assertNotIn("_generated_hash", vars(uut))
+
+        @generate_hash("value")
+        class Slotted:
+            __slots__ = ("value",)
+
+            def __init__(self, value):
+                self.value = value
+
+        uut = Slotted(1)
+        self.assertEqual(hash(uut), hash((1,)))
+        uut.value = 2
+        self.assertEqual(hash(uut), hash((2,)))
+
+    def test_unhashable_member(self):
+        @generate_hash("value")
+        class TestClass:
+
+            def __init__(self, value):
+                self.value = value
+
+        with self.assertRaises(TypeError):
+            hash(TestClass([]))
+
+
 class GenerateOrderingTest(unittest.TestCase):
 
     def test_ordering(self):
@@ -283,6 +570,115 @@ class GenerateOrderingTest(unittest.TestCase):
         # Without any cookies I won't even start working
         self.assert_ordering(TestClass(2, 1, 1), TestClass(None, 1, 2))
 
+    def test_same_as_total_ordering(self):
+        import functools
+        import itertools
+
+        @generate_ordering("first", "second")
+        class TestClass:
+            def __init__(self, first, second):
+                self.first = first
+                self.second = second
+
+        # Let functools.total_ordering derive the other functions from the
+        # generated __lt__.
+        reset = {name: getattr(object, name)
+                 for name in ("__le__", "__gt__", "__ge__")}
+        Reference = functools.total_ordering(
+            type("Reference", (TestClass,), reset))
+
+        values = [None, 1, 2, {1}, {2}]
+        for a, b, c, d in itertools.product(values, repeat=4):
+            if (isinstance(a, set) != isinstance(c, set) or
+                    isinstance(b, set) != isinstance(d, set)):
+                continue
+
+            for name in reset:
+                self.assertEqual(
+                    getattr(TestClass(a, b), name)(TestClass(c, d)),
+                    getattr(Reference(a, b), name)(Reference(c, d)),
+                    (name, a, b, c, d))
+
+    def test_user_defined_functions(self):
+        @generate_ordering("value")
+        class TestClass:
+            def __init__(self, value):
+                self.value = value
+
+            def __gt__(self, other):
+                return "custom"
+
+        self.assertEqual(TestClass(1) > TestClass(2), "custom")
+        self.assertTrue(TestClass(1) >= TestClass(1))
+
+        @generate_ordering("value", "more")
+        class Derived(TestClass):
+            def __init__(self, value, more):
+                TestClass.__init__(self, value)
+                self.more = more
+
+        self.assertEqual(Derived(1, 2) > Derived(1, 1), "custom")
+        self.assertTrue(Derived(1, 1) <= Derived(1, 2))
+        self.assertFalse(Derived(1, 2) <= Derived(1, 1))
+
+    def test_special_member_names(self):
+        @generate_ordering("class", "value")
+        class TestClass:
+            def __init__(self, cls, value):
+                setattr(self, "class", cls)
+                self.value = value
+
+        self.assertLess(TestClass(1, 2), TestClass(2, 1))
+        self.assertEqual(TestClass(1, 2), TestClass(1, 2))
+        self.assertEqual(TestClass.__lt__.__qualname__,
+                         TestClass.__qualname__ + ".__lt__")
+
+    def test_sort_key(self):
+        import random
+
+        @generate_ordering("first", "second")
+        class TestClass:
+            def __init__(self, first, second):
+                self.first = first
+                self.second = second
+
+        class Derived(TestClass):
+            pass
+
+        rng = random.Random(5)
+        values = [None, 1, 2, 3]
+        items = [rng.choice((TestClass, Derived))(rng.choice(values),
+                                                  rng.choice(values))
+                 for _ in range(200)]
+
+        self.assertEqual(sorted(items, key=TestClass.sort_key), sorted(items))
+        for reverse in (False, True):
+            result = fast_sorted(iter(items), reverse=reverse)
+            expected = sorted(items, reverse=reverse)
+            # Compare identities to make sure the sort is stable as well.
+            self.assertEqual(list(map(id, result)), list(map(id, expected)))
+
+    def test_fast_sorted_fallback(self):
+        @generate_ordering("value")
+        class First:
+            def __init__(self, value):
+                self.value = value
+
+        @generate_ordering("value")
+        class Second(First):
+            pass
+
+        self.assertEqual(fast_sorted([]), [])
+        self.assertEqual(fast_sorted([3, 1, 2]), [1, 2, 3])
+        self.assertEqual([item.value for item in
+                          fast_sorted([Second(2), Second(1), Second(3)])],
+                         [1, 2, 3])
+        # Different keys must not hide the errors sorted() raises.
+        with self.assertRaises(TypeError):
+            fast_sorted([First(2), Second(1), First(3)])
+        with self.assertRaises(TypeError):
+            fast_sorted([First(1), 2])
+
     def assert_equal(self, first, second):
         self.assertGreaterEqual(first, second)
         self.assertEqual(first, second)
@@ -349,3 +745,145 @@ class EnforceSignatureTest(unittest.TestCase):
         test_function(ClassA(), "t")
         test_function_2(ClassA(), "t")
         test_function_2(ClassB(), "t")
+
+    def test_error_message(self):
+        @enforce_signature
+        def test_function(a: (int, None), b: str = "x"):
+            pass
+
+        with self.assertRaisesRegex(
+                TypeError,
+                r"^a must be an instance of one of \(<class 'int'>, None\) "
+                r"\(provided value: 'x'\)$"):
+            test_function("x")
+
+        with self.assertRaisesRegex(TypeError, r"^b must be an instance"):
+            test_function(None, b=4)
+
+    def test_type_values(self):
+        @enforce_signature
+        def test_function(a: int, b: (5, "t")):
+            pass
+
+        # Like with assert_right_type the annotated values themselves are
+        # allowed too.
+        test_function(int, 5)
+        test_function(True, "t")
+
+        with self.assertRaises(TypeError):
+            test_function(1, 6)
+
+    def test_disabled(self):
+        @enforce_signature
+        def test_function(a: int):
+            return a
+
+        set_signature_enforcement(False)
+        try:
+            self.assertEqual(test_function("t"), "t")
+            self.assertEqual(test_function(a="t"), "t")
+        finally:
+            set_signature_enforcement(True)
+
+        with self.assertRaises(TypeError):
+            test_function("t")
+
+    def test_assert_right_type(self):
+        class ClassA:
+            pass
+
+        assert_right_type(5, int, "a")
+        assert_right_type(None, (str, None), "a")
+        assert_right_type("t", (5, "t"), "a")
+        assert_right_type(ClassA(), signature_type_by_name("ClassA"), "a")
+        assert_right_type(ClassA(), (int, signature_type_by_name("ClassA")),
+                          "a")
+
+        with self.assertRaisesRegex(TypeError, "^a must be an instance"):
+            assert_right_type("5", (int, signature_type_by_name("ClassA")),
+                              "a")
+
+
+class CachedClassPropertyTest(unittest.TestCase):
+
+    def test_concurrent_access(self):
+        calls = []
+
+        class Registry:
+            @cached_classproperty
+            def table(cls):
+                calls.append(cls)
+                time.sleep(0.01)
+                return object()
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+                                        Registry.table))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(calls, [Registry])
+        self.assertEqual(len(set(map(id, results))), 1)
+
+    def test_subclasses(self):
+        class Registry:
+            @cached_classproperty
+            def table(cls):
+                return [cls]
+
+        class Derived(Registry):
+            pass
+
+        table = Registry.table
+        self.assertEqual(Derived.table, [Derived])
+        self.assertIs(Registry.table, table)
+
+        vars(Registry)['table'].invalidate(Derived)
+        self.assertIs(Registry.table, table)
+        self.assertEqual(Derived.table, [Derived])
+
+        vars(Registry)['table'].invalidate()
+        self.assertIsNot(Registry.table, table)
+        self.assertEqual(Registry.table, [Registry])
+
+
+class GenerateConsistencyCheckTest(unittest.TestCase):
+
+    def define_class(self, *members):
+        @generate_consistency_check(*members)
+        class Record(namedtuple("RecordBase", "a, b, c")):
+            pass
+
+        return Record
+
+    def test_check_consistency_many(self):
+        Record = self.define_class("a", "b")
+        records = [Record(1, "x", None),
+                   Record(0, "x", None),
+                   Record(1, "", None),
+                   Record(None, None, 1),
+                   Record([1], (2,), None),
+                   Record([], (2,), None)]
+        expected = [index for index, record in enumerate(records)
+                    if not record.check_consistency()]
+        self.assertEqual(expected, [1, 2, 3, 5])
+        self.assertEqual(Record.check_consistency_many(records), expected)
+        self.assertEqual(
+            Record.check_consistency_many(record for record in records),
+            expected)
+        self.assertEqual(Record.check_consistency_many([]), [])
+
+    def test_single_member(self):
+        Record = self.define_class("c")
+        self.assertEqual(Record.check_consistency_many(
+            iter([Record(0, 0, 1), Record(1, 1, None), Record(1, 1, False)])),
+            [1, 2])
+
+    def test_no_members(self):
+        Record = self.define_class()
+        records = [Record(None, None, None), Record(1, 2, 3)]
+        self.assertTrue(all(record.check_consistency() for record in records))
+        self.assertEqual(Record.check_consistency_many(records), [])
@@ -49,6 +49,16 @@ class FilePathCompleterTest(unittest.TestCase):
         self.fpc.deactivate()
         self.assertEqual(readline.get_completer(), None)
 
+    def test_seed_dir(self):
+        self.fpc.activate(seed_dir="test_dir")
+        self.assertEqual(os.getcwd(), self.directory)
+        self.assert_expected_output("", ["a_file", "b_file"])
+        self.assert_expected_output(
+            os.path.join(self.directory, "c_fi"),
+            [os.path.join(self.directory, "c_file")])
+        self.fpc.deactivate()
+        self.assert_expected_output("c_fi", ["c_file"])
+
     def tearDown(self):
         shutil.rmtree("test_dir")
         os.remove("c_file")
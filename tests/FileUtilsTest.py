@@ -0,0 +1,36 @@
+import os
+import tempfile
+import unittest
+
+from coala_utils import FileUtils
+from coala_utils.FileUtils import (
+    _remove_memory_tempdir, create_tempfile, get_memory_tempdir)
+
+
+class GetMemoryTempdirTest(unittest.TestCase):
+
+    def setUp(self):
+        self.memory_tempdir = FileUtils._memory_tempdir
+        self.shared_memory_directory = FileUtils.SHARED_MEMORY_DIRECTORY
+
+    def tearDown(self):
+        FileUtils._memory_tempdir = self.memory_tempdir
+        FileUtils.SHARED_MEMORY_DIRECTORY = self.shared_memory_directory
+
+    def test_fallback(self):
+        FileUtils._memory_tempdir = None
+        FileUtils.SHARED_MEMORY_DIRECTORY = os.path.join(
+            tempfile.gettempdir(), "nonexistent", "shm")
+
+        directory = get_memory_tempdir()
+        self.assertEqual(os.path.dirname(directory), tempfile.gettempdir())
+        self.assertEqual(get_memory_tempdir(), directory)
+
+        filename = create_tempfile(in_memory=True)
+        self.assertEqual(os.path.dirname(filename), directory)
+
+        # Only the process that created the directory removes it.
+        _remove_memory_tempdir(directory, os.getpid() + 1)
+        self.assertTrue(os.path.exists(filename))
+        _remove_memory_tempdir(directory, os.getpid())
+        self.assertFalse(os.path.exists(directory))
@@ -0,0 +1,91 @@
+import signal
+import sys
+import time
+import unittest
+
+from coala_utils.ProcessUtils import run_processes
+
+
+class RunProcessesTest(unittest.TestCase):
+
+    def test_order(self):
+        commands = [[sys.executable,
+                     "-c",
+                     "import time; time.sleep({}); print({})".format(
+                         0.3 - 0.1 * i, i)]
+                    for i in range(3)]
+        results = run_processes(commands, max_parallel=3,
+                                universal_newlines=True)
+        self.assertEqual([result.command for result in results], commands)
+        self.assertEqual([result.stdout for result in results],
+                         ["0\n", "1\n", "2\n"])
+        self.assertEqual([result.returncode for result in results],
+                         [0, 0, 0])
+        self.assertEqual([result.timedout for result in results],
+                         [False, False, False])
+
+    def test_max_parallel(self):
+        code = "import time; print(time.time()); time.sleep(0.3)"
+        results = run_processes([[sys.executable, "-c", code]] * 4,
+                                max_parallel=2)
+        starts = sorted(float(result.stdout) for result in results)
+        # The last two processes only start once the first two finished.
+        self.assertGreater(starts[2] - starts[1], 0.2)
+
+    def test_large_output(self):
+        code = ("import sys\n"
+                "for _ in range(64):\n"
+                "    sys.stdout.write('o' * 16384)\n"
+                "    sys.stderr.write('e' * 16384)\n")
+        result, = run_processes([[sys.executable, "-c", code]], timeout=30)
+        self.assertEqual(result.stdout, b"o" * 1024 * 1024)
+        self.assertEqual(result.stderr, b"e" * 1024 * 1024)
+        self.assertFalse(result.timedout)
+        self.assertGreater(result.usage.wall_time, 0)
+
+    def test_timeout(self):
+        results = run_processes(
+            [[sys.executable, "-c", "import time; time.sleep(10)"],
+             [sys.executable, "-c", ""]],
+            timeout=0.5)
+        self.assertEqual([result.timedout for result in results],
+                         [True, False])
+        self.assertNotEqual(results[0].returncode, 0)
+
+    def test_kill_process_group(self):
+        # The grandchild inherits the output pipes and SIGINT being ignored.
+        code = ("import signal, subprocess, sys, time\n"
+                "signal.signal(signal.SIGINT, signal.SIG_IGN)\n"
+                "subprocess.Popen([sys.executable, '-c',\n"
+                "                  'import time; time.sleep(10)'])\n"
+                "time.sleep(10)\n")
+        start = time.monotonic()
+        result, = run_processes([[sys.executable, "-c", code]], timeout=0.5,
+                                kill_pg=True, grace_periods=(0.2,))
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertTrue(result.timedout)
+        self.assertEqual(result.returncode, -signal.SIGTERM)
+
+    def test_invalid_command(self):
+        start = time.monotonic()
+        with self.assertRaises(OSError):
+            run_processes([[sys.executable, "-c", "import time; "
+                                                  "time.sleep(0.2)"],
+                           ["/nonexistent/command"]] +
+                          [[sys.executable, "-c", "import time; "
+                                                  "time.sleep(10)"]] * 2,
+                          max_parallel=2)
+        self.assertLess(time.monotonic() - start, 5)
+
+    def test_invalid_command_while_submitting(self):
+        def commands():
+            yield ["/nonexistent/command"]
+            # Let the first command fail before the next one is submitted.
+            time.sleep(0.5)
+            yield [sys.executable, "-c", "import time; time.sleep(10)"]
+            self.fail("No more commands should be retrieved.")
+
+        start = time.monotonic()
+        with self.assertRaises(OSError):
+            run_processes(commands(), max_parallel=2)
+        self.assertLess(time.monotonic() - start, 5)
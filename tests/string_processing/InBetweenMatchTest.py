@@ -49,3 +49,10 @@ class InBetweenMatchTest(unittest.TestCase):
         self.assertEqual(uut.inside.position, 77)
         self.assertEqual(str(uut.end), "rises")
         self.assertEqual(uut.end.position, 90)
+
+    def test_hash(self):
+        self.assertEqual(
+            len({InBetweenMatch.from_values("(", 0, "a", 1, ")", 2),
+                 InBetweenMatch.from_values("(", 0, "a", 1, ")", 2),
+                 InBetweenMatch.from_values("(", 0, "b", 1, ")", 2)}),
+            2)
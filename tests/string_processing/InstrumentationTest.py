@@ -0,0 +1,88 @@
+import sys
+import unittest
+
+from coala_utils import string_processing
+from coala_utils.string_processing import Core, split, unescaped_split
+from coala_utils.string_processing.Instrumentation import (
+    disable_instrumentation, enable_instrumentation, instrument)
+
+
+class InstrumentationTest(unittest.TestCase):
+
+    def tearDown(self):
+        disable_instrumentation()
+
+    def test_disabled(self):
+        original = Core.split
+
+        with instrument():
+            self.assertIsNot(string_processing.split, original)
+            self.assertIsNot(split, original)
+
+        self.assertIs(Core.split, original)
+        self.assertIs(string_processing.split, original)
+        self.assertIs(split, original)
+
+    def test_blocked_module(self):
+        # Entries of ``sys.modules`` set to None block importing a module.
+        original = Core.split
+        sys.modules["_blocked_by_instrumentation_test"] = None
+        try:
+            with instrument():
+                self.assertIsNot(split, original)
+        finally:
+            del sys.modules["_blocked_by_instrumentation_test"]
+
+    def test_statistics(self):
+        with instrument() as instrumentation:
+            self.assertEqual(list(split(",", "a,b,,c")), ["a", "b", "", "c"])
+            self.assertEqual(list(split(",", "x,y")), ["x", "y"])
+            list(unescaped_split(";", r"a\;b;c"))
+            list(string_processing.nested_search_in_between(
+                "(", ")", "(a(b))(c)"))
+
+        statistics = instrumentation.statistics
+        self.assertEqual(statistics["split", ","].calls, 2)
+        self.assertEqual(statistics["split", ","].bytes_scanned, 9)
+        self.assertEqual(statistics["split", ","].matches, 6)
+        self.assertEqual(statistics["search_for", ","].matches, 4)
+        self.assertEqual(statistics["unescaped_split", ";"].matches, 2)
+        self.assertEqual(statistics["unescaped_search_for", ";"].matches, 1)
+        self.assertEqual(
+            statistics["nested_search_in_between", ("(", ")")].matches, 2)
+        self.assertGreaterEqual(statistics["split", ","].time,
+                                statistics["search_for", ","].time)
+
+        # Calls after disabling are not recorded anymore.
+        list(split(",", "a,b"))
+        self.assertEqual(statistics["split", ","].calls, 2)
+
+    def test_callback(self):
+        calls = []
+        enable_instrumentation(
+            lambda *args: calls.append(args[:4]))
+
+        iterator = string_processing.search_for("a", "banana")
+        next(iterator)
+        self.assertEqual(calls, [])
+        iterator.close()
+        self.assertEqual(calls, [("search_for", "a", 6, 1)])
+
+    def test_report(self):
+        with instrument() as instrumentation:
+            list(string_processing.search_in_between("'", "'", "'a' 'b'",
+                                                     use_regex=False))
+
+        lines = instrumentation.report().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith("search_in_between "))
+        self.assertTrue(lines[1].endswith("(\"'\", \"'\")"))
+        self.assertEqual(len(instrumentation.report(limit=0).splitlines()), 1)
+
+    def test_reenable(self):
+        first = enable_instrumentation()
+        second = enable_instrumentation()
+        list(string_processing.split(",", "a,b"))
+
+        self.assertEqual(first.statistics, {})
+        self.assertEqual(second.statistics["split", ","].calls, 1)
@@ -1,3 +1,7 @@
+import os
+import pickle
+import subprocess
+import sys
 import unittest
 
 from coala_utils.string_processing import Match
@@ -24,3 +28,22 @@ class MatchTest(unittest.TestCase):
         self.assertEqual(uut.end_position, 62)
         self.assertEqual(uut.range, (48, 62))
         self.assertEqual(len(uut), 14)
+
+    def test_hash(self):
+        self.assertEqual(len({Match("ABC", 0), Match("ABC", 0),
+                              Match("ABC", 1), Match("AB", 0)}),
+                         3)
+
+    def test_hash_pickled_across_processes(self):
+        # String hashes differ between processes.
+        code = ("import pickle, sys\n"
+                "from coala_utils.string_processing import Match\n"
+                "match = Match('abc', 1)\n"
+                "hash(match)\n"
+                "sys.stdout.buffer.write(pickle.dumps(match))")
+        data = subprocess.check_output([sys.executable, "-c", code],
+                                       env=dict(os.environ,
+                                                PYTHONHASHSEED="1"))
+        match = pickle.loads(data)
+        self.assertEqual(hash(match), hash(Match("abc", 1)))
+        self.assertIn(match, {Match("abc", 1)})
@@ -0,0 +1,76 @@
+from coala_utils.string_processing import (
+    InBetweenMatch, NestedInBetweenMatch, nested_search_in_between,
+    nested_search_tree)
+from tests.string_processing.StringProcessingTestBase import (
+    StringProcessingTestBase)
+
+
+class NestedSearchTreeTest(StringProcessingTestBase):
+
+    # The roots of the tree must be the matches nested_search_in_between()
+    # returns.
+    def test_roots(self):
+        for test_string in self.search_in_between_test_strings:
+            for use_regex, begin, end in [(False, "(", ")"),
+                                          (True, r"\(", r"\)")]:
+                roots = list(nested_search_tree(begin, end, test_string,
+                                                use_regex))
+                self.assertEqual(
+                    roots,
+                    list(nested_search_in_between(begin, end, test_string,
+                                                  use_regex=use_regex)))
+                for root in roots:
+                    self.assertIsInstance(root, NestedInBetweenMatch)
+                    self.assertEqual(root.depth, 0)
+
+    # Every node must match what nested_search_in_between() returns when
+    # reinvoked on the inside of its parent.
+    def test_levels(self):
+        def reinvoked(match):
+            offset = match.inside.position
+            return [InBetweenMatch.from_values(
+                        str(child.begin), child.begin.position + offset,
+                        str(child.inside), child.inside.position + offset,
+                        str(child.end), child.end.position + offset)
+                    for child in nested_search_in_between(
+                        "(", ")", str(match.inside))]
+
+        for test_string in self.search_in_between_test_strings:
+            for root in nested_search_tree("(", ")", test_string):
+                for node in root.walk():
+                    self.assertEqual(list(node.children), reinvoked(node))
+                    for child in node.children:
+                        self.assertEqual(child.depth, node.depth + 1)
+
+    def test_tree(self):
+        roots = list(nested_search_tree("<", ">", "x<a<b<c>><d>>y<>"))
+
+        self.assertEqual([root.range for root in roots], [(1, 13), (14, 16)])
+        self.assertEqual(
+            [(str(node.inside), node.depth, node.range)
+             for node in roots[0].walk()],
+            [("a<b<c>><d>", 0, (1, 13)),
+             ("b<c>", 1, (3, 9)),
+             ("c", 2, (5, 8)),
+             ("d", 1, (9, 12))])
+        self.assertEqual(roots[1].children, ())
+
+    def test_deep_nesting(self):
+        depth = 5000
+        roots = list(nested_search_tree("[", "]",
+                                        "[" * depth + "x" + "]" * depth))
+
+        nodes = list(roots[0].walk())
+        self.assertEqual(len(nodes), depth)
+        self.assertEqual(nodes[-1].depth, depth - 1)
+        self.assertEqual(str(nodes[-1].inside), "x")
+        self.assertRegex(repr(roots[0]),
+                         r"^<NestedInBetweenMatch object\(begin=.*, "
+                         r"depth=0, children=1\) at 0x[0-9a-fA-F]+>$")
+
+    # Test for special cases that exposed bugs earlier in
+    # nested_search_in_between().
+    def test_special(self):
+        self.assertEqual(list(nested_search_tree("(", ")", "a)b(c")), [])
+        self.assertEqual(list(nested_search_tree("(", ")", "((a)")), [])
+        self.assertEqual(list(nested_search_tree("(", "(", "(a(")), [])
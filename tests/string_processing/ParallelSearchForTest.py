@@ -0,0 +1,94 @@
+import mmap
+import tempfile
+
+from coala_utils.string_processing import (
+    Match, parallel_search_for, search_for)
+from tests.string_processing.StringProcessingTestBase import (
+    StringProcessingTestBase)
+
+
+class ParallelSearchForTest(StringProcessingTestBase):
+
+    @staticmethod
+    def list_matches(it):
+        return [(match.match, match.position) for match in it]
+
+    def assertSameAsSearchFor(self, pattern, string, use_regex=False,
+                              max_match_length=None, chunk_sizes=(1, 3, 7)):
+        expected = [(match.group(), match.start())
+                    for match in search_for(pattern, string,
+                                            use_regex=use_regex)]
+
+        for chunk_size in chunk_sizes:
+            self.assertEqual(
+                self.list_matches(parallel_search_for(
+                    pattern, string, use_regex=use_regex, workers=2,
+                    chunk_size=chunk_size,
+                    max_match_length=max_match_length)),
+                expected,
+                "Called parallel_search_for({!r}, {!r}, chunk_size={})"
+                .format(pattern, string, chunk_size))
+
+    def test_simple_pattern(self):
+        self.assertSameAsSearchFor(
+            "'", "".join(self.test_strings), chunk_sizes=(5, 16))
+        self.assertSameAsSearchFor(
+            "out", "".join(self.test_strings), chunk_sizes=(5, 16))
+
+    # Matches that cross chunk borders and matches whose chunk search gets
+    # out of sync with a sequential search.
+    def test_chunk_borders(self):
+        self.assertSameAsSearchFor("aa", "aaaaaaa")
+        self.assertSameAsSearchFor("aba", "abababab-aba")
+        self.assertSameAsSearchFor(r"b?a{1,3}", "baaaabaaaa", True, 4)
+        self.assertSameAsSearchFor(r"(?:ab|b)a?", "abababbab", True, 3)
+
+    def test_resync_past_chunk(self):
+        # The sequential search from the end of the last match reaches the
+        # next chunk before matching up with a match of the current chunk.
+        self.assertSameAsSearchFor(r"a{1,2}", "aaaa", True, 2, (1,))
+        self.assertSameAsSearchFor(r"aab|a", "aaaba", True, 3, (1,))
+
+    def test_empty_matches(self):
+        self.assertSameAsSearchFor("", "abc")
+        self.assertSameAsSearchFor(r"a*", "baaab", True, 3)
+
+    def test_max_match(self):
+        self.assertEqual(
+            list(parallel_search_for("a", "abaca", max_match=2, workers=2,
+                                     chunk_size=1)),
+            [Match("a", 0), Match("a", 2)])
+
+    def test_in_process(self):
+        self.assertEqual(
+            self.list_matches(parallel_search_for("out.", self.test_strings[6],
+                                                  use_regex=True,
+                                                  max_match_length=4)),
+            [("out1", 0), ("out2", 22), ("out2", 34)])
+        self.assertEqual(
+            self.list_matches(parallel_search_for("a", "aba", workers=1,
+                                                  chunk_size=1)),
+            [("a", 0), ("a", 2)])
+
+    def test_buffers(self):
+        data = b"xyz" * 10
+
+        with tempfile.TemporaryFile() as file:
+            file.write(data)
+            file.flush()
+            with mmap.mmap(file.fileno(), 0) as buffer:
+                self.assertEqual(
+                    len(list(parallel_search_for(b"zx", buffer, workers=2,
+                                                 chunk_size=4))),
+                    9)
+
+        self.assertEqual(
+            self.list_matches(parallel_search_for(b"yz", memoryview(data),
+                                                  workers=2, chunk_size=7))[:2],
+            [(b"yz", 1), (b"yz", 4)])
+
+    def test_invalid_arguments(self):
+        self.assertRaises(ValueError, parallel_search_for, "a+", "aaa",
+                          use_regex=True)
+        self.assertRaises(ValueError, parallel_search_for, "a", "aaa",
+                          chunk_size=0)
@@ -0,0 +1,137 @@
+from coala_utils.string_processing import (
+    InBetweenMatch, nested_search_in_between, position_is_escaped,
+    unescaped_nested_search_in_between)
+from tests.string_processing.StringProcessingTestBase import (
+    StringProcessingTestBase)
+
+
+class UnescapedNestedSearchInBetweenTest(StringProcessingTestBase):
+    bs = StringProcessingTestBase.bs
+
+    test_basic_expected_results = [
+        [("(", 0, "", 1, ")", 1),
+         ("(", 6, "This is a word", 7, ")", 21),
+         ("(", 25, "(in a word) another ", 26, ")", 46)],
+        [("(", 4, "((((((((((((((((((1)2)3))))))))))))))))", 5, ")", 44)],
+        [("(", 6, "do (it ) more ", 7, ")", 21),
+         ("(", 41, "", 42, ")", 42),
+         ("(", 44, "hello.", 45, ")", 51)],
+        [("(", 0, "", 1, ")", 1)],
+        [("(", 10,
+          r"((((\\\(((((((((((1)2)3))\\\\\)))))))))))", 11,
+          ")", 52)],
+        [("(", 11, "it ", 12, ")", 15),
+         ("(", 45, "", 46, ")", 46),
+         ("(", 48, "hello.", 49, ")", 55)]]
+
+    # Test the basic functionality of unescaped_nested_search_in_between().
+    def test_basic(self):
+        self.assertResultsEqual(
+            unescaped_nested_search_in_between,
+            {(self.search_in_between_begin_pattern,
+              self.search_in_between_end_pattern,
+              test_string,
+              0,
+              False,
+              False): [InBetweenMatch.from_values(*args)
+                       for args in result]
+             for test_string, result in zip(
+                 self.search_in_between_test_strings,
+                 self.test_basic_expected_results)},
+            list)
+
+    # The results must equal the ones of nested_search_in_between() when
+    # escaped sequences are removed from the string beforehand.
+    def test_escaped_sequences_ignored(self):
+        for test_string in self.search_in_between_test_strings:
+            masked = "".join(
+                "_" if char in "()" and position_is_escaped(test_string, i)
+                else char
+                for i, char in enumerate(test_string))
+
+            self.assertEqual(
+                [(match.begin.position, match.end.position)
+                 for match in unescaped_nested_search_in_between(
+                     "(", ")", test_string)],
+                [(match.begin.position, match.end.position)
+                 for match in nested_search_in_between("(", ")", masked)])
+
+    # Test unescaped_nested_search_in_between() when feeding it with the same
+    # begin- and end-sequences.
+    def test_same_pattern(self):
+        self.assertResultsEqual(
+            unescaped_nested_search_in_between,
+            {(pattern, pattern, test_string, 0, False, False): []
+             for test_string in self.search_in_between_test_strings
+             for pattern in [self.search_in_between_begin_pattern,
+                             self.search_in_between_end_pattern]},
+            list)
+
+    # Test unescaped_nested_search_in_between() for its max_match parameter.
+    def test_max_match(self):
+        self.assertResultsEqual(
+            unescaped_nested_search_in_between,
+            {(self.search_in_between_begin_pattern,
+              self.search_in_between_end_pattern,
+              test_string,
+              max_match,
+              False,
+              False): [InBetweenMatch.from_values(*args)
+                       for args in result]
+             for max_match in [1, 2, 5, 22]
+             for test_string, result in zip(
+                 self.search_in_between_test_strings,
+                 [elem[0:max_match]
+                     for elem in self.test_basic_expected_results])},
+            list)
+
+    # Test unescaped_nested_search_in_between() with a regex pattern.
+    def test_regex_pattern(self):
+        self.assertResultsEqual(
+            unescaped_nested_search_in_between,
+            {(r"(?:)\(", r"\)(?:)", test_string, 0, False, True):
+             [InBetweenMatch.from_values(*args) for args in result]
+             for test_string, result in zip(
+                 self.search_in_between_test_strings,
+                 self.test_basic_expected_results)},
+            list)
+
+    # Capturing groups inside the patterns must not shift the end match.
+    def test_regex_pattern_groups(self):
+        self.assertEqual(
+            list(unescaped_nested_search_in_between(
+                r"(\()", r"(\))", r"a(b\)(c))", use_regex=True)),
+            [InBetweenMatch.from_values("(", 1, r"b\)(c)", 2, ")", 8)])
+
+    # Test unescaped_nested_search_in_between() for its auto_trim feature.
+    def test_auto_trim(self):
+        self.assertResultsEqual(
+            unescaped_nested_search_in_between,
+            {(begin_pattern,
+              end_pattern,
+              test_string,
+              max_match,
+              True,
+              use_regex): [InBetweenMatch.from_values(*args)
+                           for args in result
+                           if args[2] != ""][0:max_match or None]
+             for test_string, result in zip(
+                 self.search_in_between_test_strings,
+                 self.test_basic_expected_results)
+             for max_match in [0, 1, 2]
+             for use_regex, begin_pattern, end_pattern in [
+                 (True, r"\(", r"\)"),
+                 (False,
+                  self.search_in_between_begin_pattern,
+                  self.search_in_between_end_pattern)]},
+            list)
+
+    # Test for special cases that exposed bugs earlier.
+    def test_special(self):
+        self.assertResultsEqual(
+            unescaped_nested_search_in_between,
+            {("(", ")", "a)b(c", 0, True, False): [],
+             ("(", ")", self.bs + "()", 0, False, False): [],
+             ("(", ")", 2 * self.bs + "()", 0, False, False):
+                 [InBetweenMatch.from_values("(", 2, "", 3, ")", 3)]},
+            list)